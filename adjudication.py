@@ -0,0 +1,146 @@
+import logging
+import queue
+
+import chess
+import chess.engine
+import chess.syzygy
+
+from arena_logging import get_logger, log_event
+from metrics import metrics
+
+logger = get_logger("adjudication")
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900}
+MATE_SCORE = 100000
+ADJUDICATION_MODES = ("material", "engine")
+
+
+def material_score(board):
+    score = 0
+    for piece_type, value in PIECE_VALUES.items():
+        score += value * (len(board.pieces(piece_type, chess.WHITE)) - len(board.pieces(piece_type, chess.BLACK)))
+    return score
+
+
+class MaterialEvaluator:
+    def evaluate(self, board):
+        return material_score(board)
+
+    def close(self):
+        pass
+
+
+class EnginePool:
+    def __init__(self, command, size=1, depth=10, time=None, options=None):
+        self.command = command
+        self.limit = chess.engine.Limit(depth=depth, time=time)
+        self.engines = []
+        self.idle = queue.Queue()
+        for _ in range(size):
+            engine = chess.engine.SimpleEngine.popen_uci(command)
+            if options:
+                engine.configure(options)
+            self.engines.append(engine)
+            self.idle.put(engine)
+        log_event(logger, logging.INFO, "engine_pool_started", command=command, engines=size)
+
+    def evaluate(self, board):
+        engine = self.idle.get()
+        try:
+            info = engine.analyse(board, self.limit)
+        finally:
+            self.idle.put(engine)
+        return info["score"].white().score(mate_score=MATE_SCORE)
+
+    def close(self):
+        for engine in self.engines:
+            try:
+                engine.quit()
+            except chess.engine.EngineError:
+                pass
+
+
+class Adjudicator:
+    def __init__(self, evaluator, score=600, plies=8, draw_score=10, draw_plies=0, max_plies=None, tablebase=None):
+        self.evaluator = evaluator
+        self.score = score
+        self.plies = plies
+        self.draw_score = draw_score
+        self.draw_plies = draw_plies
+        self.max_plies = max_plies
+        self.tablebase = tablebase
+
+    def tracker(self):
+        return AdjudicationTracker(self)
+
+    def probe(self, board):
+        if self.tablebase is None or board.castling_rights or chess.popcount(board.occupied) > 7:
+            return None
+        try:
+            wdl = self.tablebase.probe_wdl(board)
+        except (KeyError, chess.syzygy.MissingTableError):
+            return None
+        if abs(wdl) < 2:
+            return "1/2-1/2", "Adjudicated: tablebase draw"
+        white_wins = (wdl > 0) == (board.turn == chess.WHITE)
+        return ("1-0", "Adjudicated: tablebase win for white") if white_wins else \
+            ("0-1", "Adjudicated: tablebase win for black")
+
+    def verdict(self, result, termination):
+        metrics.inc("arena_adjudications_total", result=result)
+        log_event(logger, logging.DEBUG, "game_adjudicated", result=result, termination=termination)
+        return result, termination
+
+    def close(self):
+        self.evaluator.close()
+        if self.tablebase is not None:
+            self.tablebase.close()
+
+
+class AdjudicationTracker:
+    def __init__(self, adjudicator):
+        self.adjudicator = adjudicator
+        self.win_streak = 0
+        self.draw_streak = 0
+
+    def update(self, board):
+        adjudicator = self.adjudicator
+        tablebase = adjudicator.probe(board)
+        if tablebase is not None:
+            return adjudicator.verdict(*tablebase)
+
+        score = adjudicator.evaluator.evaluate(board)
+        if abs(score) >= adjudicator.score:
+            sign = 1 if score > 0 else -1
+            self.win_streak = self.win_streak + sign if self.win_streak * sign >= 0 else sign
+        else:
+            self.win_streak = 0
+        self.draw_streak = self.draw_streak + 1 if abs(score) <= adjudicator.draw_score else 0
+
+        if abs(self.win_streak) >= adjudicator.plies:
+            winner = "white" if self.win_streak > 0 else "black"
+            return adjudicator.verdict("1-0" if self.win_streak > 0 else "0-1",
+                                       f"Adjudicated: {winner} ahead by {abs(score)} cp for {adjudicator.plies} plies")
+        if adjudicator.draw_plies and self.draw_streak >= adjudicator.draw_plies:
+            return adjudicator.verdict("1/2-1/2", f"Adjudicated: draw, within {adjudicator.draw_score} cp "
+                                                  f"for {adjudicator.draw_plies} plies")
+        if adjudicator.max_plies and len(board.move_stack) >= adjudicator.max_plies:
+            if abs(score) >= adjudicator.score:
+                return adjudicator.verdict("1-0" if score > 0 else "0-1",
+                                           f"Adjudicated: move limit, {abs(score)} cp ahead")
+            return adjudicator.verdict("1/2-1/2", "Adjudicated: move limit")
+        return None
+
+
+def build_adjudicator(mode="material", engine=None, engine_pool=1, engine_depth=10, engine_time=None,
+                      syzygy=None, **options):
+    if mode not in ADJUDICATION_MODES:
+        raise ValueError(f"Unknown adjudication mode: {mode}")
+    if mode == "engine":
+        if not engine:
+            raise ValueError("Engine adjudication needs the path of a UCI engine")
+        evaluator = EnginePool(engine, engine_pool, engine_depth, engine_time)
+    else:
+        evaluator = MaterialEvaluator()
+    tablebase = chess.syzygy.open_tablebase(syzygy) if syzygy else None
+    return Adjudicator(evaluator, tablebase=tablebase, **options)
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+from array import array
+from multiprocessing.util import Finalize
+
+import chess
+import chess.engine
+import chess.pgn
+import chess.polyglot
+import numpy as np
+
+from adjudication import EnginePool
+from arena_logging import configure_logging, get_logger, log_event
+from game_archive import RESULT_CODES
+from move_cache import MoveCache
+
+logger = get_logger("analysis")
+
+SCORE_CAP = 1000
+BLUNDER_LOSS = 300
+MISTAKE_LOSS = 100
+
+worker_evaluator = None
+
+
+class TranspositionCache:
+    def __init__(self, evaluator, store, settings):
+        self.evaluator = evaluator
+        self.store = store
+        self.settings = settings
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, board):
+        key = f"{self.settings} {chess.polyglot.zobrist_hash(board):016x}"
+        score = self.store.get(key)
+        if score is not None:
+            self.hits += 1
+            return int(score)
+
+        self.misses += 1
+        if board.is_checkmate():
+            score = -SCORE_CAP if board.turn == chess.WHITE else SCORE_CAP
+        elif board.is_stalemate() or board.is_insufficient_material():
+            score = 0
+        else:
+            score = max(-SCORE_CAP, min(SCORE_CAP, self.evaluator.evaluate(board)))
+        self.store.put(key, str(score))
+        return score
+
+    def close(self):
+        self.evaluator.close()
+        self.store.close()
+
+
+def split_pgn_games(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = []
+        in_movetext = False
+        for line in f:
+            if line.startswith("[") and in_movetext:
+                yield "".join(lines)
+                lines = []
+                in_movetext = False
+            elif line.strip() and not line.startswith("["):
+                in_movetext = True
+            lines.append(line)
+        if in_movetext:
+            yield "".join(lines)
+
+
+def iter_games(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, "games.pgn")
+        if path.endswith(".json"):
+            with open(path, "r") as f:
+                yield from json.load(f)["records"]
+        else:
+            yield from split_pgn_games(path)
+
+
+def game_from_pgn(text):
+    game = chess.pgn.read_game(io.StringIO(text))
+    if game is None or game.errors:
+        raise ValueError(f"Unreadable PGN: {game.errors[0] if game is not None else text[:60]!r}")
+    headers = game.headers
+    fallback_plies = headers.get("FallbackPlies")
+    return {
+        "game_id": int(headers["GameId"]) if headers.get("GameId", "").isdigit() else None,
+        "white": headers.get("White", "?"),
+        "black": headers.get("Black", "?"),
+        "result": headers.get("Result", "*"),
+        "start_fen": headers.get("FEN"),
+        "moves": [move.uci() for move in game.mainline_moves()],
+        "book_plies": int(headers.get("BookPlies", 0)),
+        "fallback_plies": [int(ply) for ply in fallback_plies.split(",")] if fallback_plies else [],
+    }
+
+
+def init_worker(engine, depth, time_limit, cache_options, log_options):
+    global worker_evaluator
+    configure_logging(**log_options)
+    settings = f"{os.path.basename(engine)} depth={depth} time={time_limit}"
+    worker_evaluator = TranspositionCache(EnginePool(engine, 1, depth, time_limit), MoveCache(**cache_options), settings)
+    Finalize(worker_evaluator, worker_evaluator.close, exitpriority=10)
+
+
+def analyse_game(job):
+    number, game = job
+    hits, misses = worker_evaluator.hits, worker_evaluator.misses
+    try:
+        if not isinstance(game, dict):
+            game = game_from_pgn(game)
+        board = chess.Board(game.get("start_fen") or chess.STARTING_FEN)
+        book_plies = game.get("book_plies") or 0
+        fallbacks = set(game.get("fallback_plies") or ())
+        before = worker_evaluator.evaluate(board)
+        plies = []
+        for ply, uci in enumerate(game["moves"], 1):
+            white_moved = board.turn == chess.WHITE
+            board.push_uci(uci)
+            after = worker_evaluator.evaluate(board)
+            loss = max(0, before - after if white_moved else after - before)
+            plies.append((ply, white_moved, loss, ply in fallbacks, ply <= book_plies))
+            before = after
+    except (ValueError, KeyError, chess.engine.EngineError) as e:
+        return number, None, f"{type(e).__name__}: {e}", 0, 0
+    game_id = game.get("game_id")
+    summary = {"game_id": number if game_id is None else game_id, "white": game["white"], "black": game["black"],
+               "result": game.get("result", "*")}
+    return number, (summary, plies), None, worker_evaluator.hits - hits, worker_evaluator.misses - misses
+
+
+class AnalysisTables:
+    def __init__(self, blunder_loss=BLUNDER_LOSS, mistake_loss=MISTAKE_LOSS):
+        self.blunder_loss = blunder_loss
+        self.mistake_loss = mistake_loss
+        self.models = {}
+        self.games = {name: array(code) for name, code in
+                      (("game_id", "q"), ("white", "i"), ("black", "i"), ("result", "b"), ("plies", "i"),
+                       ("white_acpl", "f"), ("black_acpl", "f"))}
+        self.moves = {name: array(code) for name, code in
+                      (("game_id", "q"), ("ply", "i"), ("model", "i"), ("loss", "i"), ("fallback", "b"),
+                       ("book", "b"))}
+
+    def model_id(self, model):
+        if model not in self.models:
+            self.models[model] = len(self.models)
+        return self.models[model]
+
+    def add(self, summary, plies):
+        game_id = summary["game_id"]
+        sides = {True: self.model_id(summary["white"]), False: self.model_id(summary["black"])}
+        losses = {True: [], False: []}
+        for ply, white_moved, loss, fallback, book in plies:
+            self.moves["game_id"].append(game_id)
+            self.moves["ply"].append(ply)
+            self.moves["model"].append(sides[white_moved])
+            self.moves["loss"].append(loss)
+            self.moves["fallback"].append(fallback)
+            self.moves["book"].append(book)
+            if not fallback and not book:
+                losses[white_moved].append(loss)
+
+        self.games["game_id"].append(game_id)
+        self.games["white"].append(sides[True])
+        self.games["black"].append(sides[False])
+        self.games["result"].append(RESULT_CODES.get(summary["result"], 0))
+        self.games["plies"].append(len(plies))
+        self.games["white_acpl"].append(sum(losses[True]) / len(losses[True]) if losses[True] else float("nan"))
+        self.games["black_acpl"].append(sum(losses[False]) / len(losses[False]) if losses[False] else float("nan"))
+
+    def columns(self, table):
+        return {name: np.frombuffer(values, dtype=values.typecode) if values else np.array([], dtype=values.typecode)
+                for name, values in table.items()}
+
+    def summary(self):
+        moves = self.columns(self.moves)
+        games = self.columns(self.games)
+        played = ~moves["book"].astype(bool)
+        fallback = moves["fallback"].astype(bool)
+        rated = played & ~fallback
+        rows = []
+        for model, i in self.models.items():
+            mine = moves["model"] == i
+            model_moves = int((mine & played).sum())
+            losses = moves["loss"][mine & rated]
+            rows.append({
+                "model": model,
+                "games": int(((games["white"] == i) | (games["black"] == i)).sum()),
+                "moves": model_moves,
+                "fallback_share": float((mine & fallback).sum() / model_moves) if model_moves else 0.0,
+                "acpl": float(losses.mean()) if len(losses) else None,
+                "mistake_rate": float((losses >= self.mistake_loss).mean()) if len(losses) else None,
+                "blunder_rate": float((losses >= self.blunder_loss).mean()) if len(losses) else None,
+            })
+        return sorted(rows, key=lambda row: (row["acpl"] is None, row["acpl"] or 0.0, row["model"]))
+
+    def write(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        models = np.array(list(self.models), dtype=str)
+        np.savez(os.path.join(directory, "moves.npz"), models=models, **self.columns(self.moves))
+        np.savez(os.path.join(directory, "games.npz"), models=models, **self.columns(self.games))
+        rows = self.summary()
+        with open(os.path.join(directory, "models.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["model"])
+            writer.writeheader()
+            writer.writerows(rows)
+        return rows
+
+
+def analyse(paths, engine, workers=None, depth=8, time_limit=None, cache_options=None, chunksize=4,
+            blunder_loss=BLUNDER_LOSS, mistake_loss=MISTAKE_LOSS, log_options=None, progress_every=1000):
+    workers = workers or os.cpu_count() or 1
+    tables = AnalysisTables(blunder_loss, mistake_loss)
+    stats = {"games": 0, "skipped": 0, "positions": 0, "cache_hits": 0}
+    started = time.time()
+
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(workers, initializer=init_worker,
+                        initargs=(engine, depth, time_limit, cache_options or {}, log_options or {}))
+    try:
+        for number, analysed, error, hits, misses in pool.imap_unordered(analyse_game, enumerate(iter_games(paths)),
+                                                                         chunksize):
+            if error is not None:
+                stats["skipped"] += 1
+                log_event(logger, logging.WARNING, "game_skipped", game=number, error=error)
+                continue
+            tables.add(*analysed)
+            stats["games"] += 1
+            stats["positions"] += hits + misses
+            stats["cache_hits"] += hits
+            if progress_every and stats["games"] % progress_every == 0:
+                elapsed = time.time() - started
+                log_event(logger, logging.INFO, "analysis_progress", games=stats["games"],
+                          games_per_hour=round(stats["games"] / elapsed * 3600),
+                          cache_hit_rate=round(stats["cache_hits"] / stats["positions"], 3))
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    stats["elapsed"] = time.time() - started
+    stats["games_per_hour"] = stats["games"] / stats["elapsed"] * 3600 if stats["elapsed"] else 0.0
+    stats["cache_hit_rate"] = stats["cache_hits"] / stats["positions"] if stats["positions"] else 0.0
+    return tables, stats
+
+
+def print_summary(rows, stats):
+    print(f"Games: {stats['games']} analysed, {stats['skipped']} skipped in {stats['elapsed']:.1f}s "
+          f"({stats['games_per_hour']:.0f} games/hour, {stats['cache_hit_rate']:.1%} positions from cache)")
+    print()
+    print(f"{'Model':<45} {'G':>6} {'Moves':>7} {'ACPL':>6} {'Mistake':>8} {'Blunder':>8} {'Fallback':>9}")
+    for row in rows:
+        acpl = f"{row['acpl']:.0f}" if row['acpl'] is not None else "-"
+        mistakes = f"{row['mistake_rate']:.1%}" if row['mistake_rate'] is not None else "-"
+        blunders = f"{row['blunder_rate']:.1%}" if row['blunder_rate'] is not None else "-"
+        print(f"{row['model']:<45} {row['games']:>6} {row['moves']:>7} {acpl:>6} {mistakes:>8} {blunders:>8} "
+              f"{row['fallback_share']:>9.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every move of finished AI Chess Arena games with a UCI engine")
+    parser.add_argument("paths", nargs="+",
+                        help="PGN files, game archive directories or tournament --output JSON files")
+    parser.add_argument("--engine", required=True, help="Path of a UCI engine such as stockfish")
+    parser.add_argument("--workers", type=int, default=None, help="Engine processes (default: one per CPU)")
+    parser.add_argument("--depth", type=int, default=8, help="Search depth per position")
+    parser.add_argument("--time", type=float, default=None, help="Also limit each search to this many seconds")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="Share evaluated positions between workers and later runs through this SQLite file")
+    parser.add_argument("--cache-memory-size", type=int, default=200000,
+                        help="Positions kept in each worker's in-memory transposition cache")
+    parser.add_argument("--blunder", type=int, default=BLUNDER_LOSS, help="Centipawn loss counted as a blunder")
+    parser.add_argument("--mistake", type=int, default=MISTAKE_LOSS, help="Centipawn loss counted as a mistake")
+    parser.add_argument("--output", default=None, metavar="DIR",
+                        help="Write models.csv and the columnar games.npz and moves.npz tables to this directory")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument("--log-json", action="store_true")
+    args = parser.parse_args(argv)
+
+    log_options = dict(level=args.log_level, json_lines=args.log_json)
+    configure_logging(**log_options)
+    cache_options = dict(path=args.cache, memory_size=args.cache_memory_size)
+    tables, stats = analyse(args.paths, args.engine, args.workers, args.depth, args.time, cache_options,
+                            blunder_loss=args.blunder, mistake_loss=args.mistake, log_options=log_options)
+    rows = tables.write(args.output) if args.output else tables.summary()
+    print_summary(rows, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import contextvars
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT_LOGGER = "arena"
+
+_context = contextvars.ContextVar("arena_log_context", default={})
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+@contextmanager
+def log_context(**fields):
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def update_log_context(**fields):
+    _context.set({**_context.get(), **fields})
+
+
+def log_event(logger, level, event, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class PayloadSampler:
+    def __init__(self, rate=0.0, seed=None):
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self):
+        if self.rate <= 0:
+            return False
+        if self.rate >= 1:
+            return True
+        with self.lock:
+            return self.rng.random() < self.rate
+
+
+payload_sampler = PayloadSampler()
+
+
+def should_dump_payload(logger):
+    return logger.isEnabledFor(logging.DEBUG) and payload_sampler.sample()
+
+
+def record_fields(record):
+    fields = dict(_context.get())
+    fields.update(getattr(record, "fields", {}))
+    return fields
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record):
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        fields = " ".join(f"{key}={value}" for key, value in record_fields(record).items() if value is not None)
+        line = f"{stamp} {record.levelname:<7} {record.getMessage()}"
+        if fields:
+            line = f"{line} {fields}"
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def configure_logging(level="WARNING", json_lines=False, stream=None, payload_sample_rate=0.0):
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonLinesFormatter() if json_lines else KeyValueFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+
+    payload_sampler.rate = payload_sample_rate
+    return logger
@@ -0,0 +1,223 @@
+import logging
+import time
+
+import httpx
+
+from arena_logging import log_event
+from move_parser import StreamingMoveParser
+from openrouter_client import BaseOpenRouterClient, MoveRequestFailed, RateLimitError, logger, parse_retry_after
+
+
+class AsyncOpenRouterClient(BaseOpenRouterClient):
+    def __init__(self, api_key=None, base_url="https://openrouter.ai", max_connections=100,
+                 max_keepalive_connections=20, http2=True, timeout=30.0, cache=None, transport=None, stream=False,
+                 prompts=None):
+        super().__init__(api_key, base_url, cache, stream, prompts)
+        self.timeout = timeout
+        self.http = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(timeout, pool=None),
+            transport=transport,
+            event_hooks={"response": [self.mark_headers_received]},
+        )
+
+    async def mark_headers_received(self, response):
+        response.request.extensions["arena_headers_at"] = time.perf_counter()
+
+    def time_to_first_byte(self, response, started):
+        headers_at = response.request.extensions.get("arena_headers_at")
+        return headers_at - started if headers_at is not None else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    async def request_move(self, model, board_fen, legal_moves, current_player, check_cache=True, history=None):
+        if not self.api_key:
+            raise ValueError("API key not set")
+
+        headers = self.get_headers(move_request=True)
+        payload = self.build_move_payload(model, board_fen, legal_moves, current_player, history)
+
+        cache_key = self.cache_key(model, board_fen, payload, history)
+        if check_cache:
+            move = self.lookup_cache(cache_key, legal_moves, board_fen)
+            if move is not None:
+                self.record_cached_prompt(model, board_fen)
+                return move
+
+        if self.stream:
+            return await self.stream_move(model, headers, payload, cache_key, legal_moves, board_fen)
+
+        started = time.perf_counter()
+        response = await self.http.post(
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=headers,
+            json=payload,
+        )
+        latency = time.perf_counter() - started
+        self.record_request(model, response.status_code, latency, self.time_to_first_byte(response, started))
+
+        if response.status_code == 429:
+            raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+
+        response.raise_for_status()
+        result = response.json()
+        self.log_response(model, response.status_code, latency, result)
+        self.record_usage(model, result)
+        move = self.parse_completion(result, legal_moves, board_fen)
+        self.record_prompt(model, board_fen, payload, result.get('usage'), move, latency)
+        self.store_completion(cache_key, result, move)
+        return move
+
+    async def stream_move(self, model, headers, payload, cache_key, legal_moves, board_fen):
+        parser = StreamingMoveParser(legal_moves, board_fen, self.move_parser)
+        move = moved_at = usage = None
+        chunks = 0
+
+        started = time.perf_counter()
+        async with self.http.stream(
+            "POST",
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=headers,
+            json=dict(payload, stream=True),
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                self.record_request(model, response.status_code, time.perf_counter() - started,
+                                    self.time_to_first_byte(response, started))
+                if response.status_code == 429:
+                    raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+                response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                delta, chunk_usage, done = self.parse_stream_line(line)
+                usage = chunk_usage or usage
+                if done:
+                    break
+                if delta:
+                    chunks += 1
+                    move = parser.feed(delta)
+                    if move is not None:
+                        moved_at = time.perf_counter()
+                        break
+
+        move, latency = self.finish_stream(model, board_fen, payload, parser, cache_key, move, chunks, usage, started,
+                                           moved_at)
+        self.record_prompt(model, board_fen, payload, usage, move, latency)
+        self.record_request(model, response.status_code, latency, self.time_to_first_byte(response, started))
+        self.log_response(model, response.status_code, latency)
+        return move
+
+    async def request_moves(self, model, positions):
+        if not self.api_key:
+            raise ValueError("API key not set")
+
+        payload = self.build_batch_payload(model, positions)
+
+        started = time.perf_counter()
+        response = await self.http.post(
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=self.get_headers(move_request=True),
+            json=payload,
+        )
+        latency = time.perf_counter() - started
+        self.record_request(model, response.status_code, latency, self.time_to_first_byte(response, started))
+
+        if response.status_code == 429:
+            raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+
+        response.raise_for_status()
+        result = response.json()
+        self.log_response(model, response.status_code, latency, result)
+        self.record_usage(model, result)
+        moves, texts = self.parse_batch_completion(result, positions)
+        self.store_batch_completion(self.batch_cache_keys(model, positions), moves, texts)
+        return moves
+
+    async def get_moves(self, model, positions):
+        if not self.api_key:
+            raise ValueError("API key not set")
+
+        try:
+            return await self.request_moves(model, positions)
+
+        except (httpx.HTTPStatusError, RateLimitError) as e:
+            self.log_api_error(model, e, e.response.status_code, e.response.text)
+            self.record_error_fallback(model, str(e.response.status_code), len(positions))
+            raise MoveRequestFailed(model, str(e.response.status_code)) from e
+        except httpx.HTTPError as e:
+            self.log_api_error(model, repr(e))
+            self.record_error_fallback(model, "connection", len(positions))
+            raise MoveRequestFailed(model, "connection") from e
+        except Exception as e:
+            log_event(logger, logging.WARNING, "invalid_response", model=model, error=str(e))
+            return [None] * len(positions)
+
+    async def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        if not self.api_key:
+            raise ValueError("API key not set")
+
+        try:
+            return await self.request_move(model, board_fen, legal_moves, current_player, history=history)
+
+        except (httpx.HTTPStatusError, RateLimitError) as e:
+            self.log_api_error(model, e, e.response.status_code, e.response.text)
+            self.record_error_fallback(model, str(e.response.status_code))
+            raise MoveRequestFailed(model, str(e.response.status_code)) from e
+        except httpx.HTTPError as e:
+            self.log_api_error(model, repr(e))
+            self.record_error_fallback(model, "connection")
+            raise MoveRequestFailed(model, "connection") from e
+        except Exception as e:
+            log_event(logger, logging.WARNING, "invalid_response", model=model, error=str(e))
+            self.record_error_fallback(model, "invalid_response")
+            raise MoveRequestFailed(model, "invalid_response") from e
+
+    async def test_connection(self):
+        if not self.api_key:
+            return False, "API key not set"
+
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/api/v1/models",
+                headers=self.get_headers(),
+                timeout=10,
+            )
+
+            if response.status_code == 200:
+                return True, "Connection successful"
+            else:
+                return False, f"HTTP {response.status_code}: {response.text}"
+
+        except Exception as e:
+            return False, f"Connection failed: {str(e)}"
+
+    async def get_available_models(self):
+        if not self.api_key:
+            return []
+
+        try:
+            response = await self.http.get(
+                f"{self.base_url}/api/v1/models",
+                headers=self.get_headers(),
+                timeout=10,
+            )
+
+            if response.status_code == 200:
+                return self.parse_free_models(response.json())
+            else:
+                return []
+
+        except Exception as e:
+            log_event(logger, logging.WARNING, "models_fetch_failed", error=str(e))
+            return []
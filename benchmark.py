@@ -0,0 +1,320 @@
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import time
+
+import chess
+
+from arena_logging import configure_logging
+from chess_engine import ChessGame
+from mock_backend import VERBOSE_TEMPLATES, install_mock_backend
+from move_batcher import MoveBatcher
+from move_parser import StreamingMoveParser
+from openrouter_client import OpenRouterClient
+from scheduler import RequestScheduler
+from tournament import TournamentRunner
+
+REGRESSION_METRICS = [
+    ("end_to_end.games_per_sec", True),
+    ("end_to_end.plies_per_sec", True),
+    ("chess_game.cached.us_per_ply", False),
+    ("parser.us_per_call", False),
+    ("gui.draw_pieces_ms", False),
+]
+
+DECOY_TEMPLATES = [
+    "I could play {decoy}, but {move} is more solid. Move: {move}",
+    "After {decoy} the position gets sharp; my move: {move}",
+]
+
+
+class RecomputingChessGame(ChessGame):
+    def get_board(self):
+        board_array = []
+        for rank in range(8):
+            row = []
+            for file in range(8):
+                piece = self.board.piece_at(chess.square(file, 7 - rank))
+                row.append('.' if piece is None else piece.symbol())
+            board_array.append(row)
+        return board_array
+
+    def get_fen(self):
+        return self.board.fen()
+
+    def get_legal_moves(self):
+        return [move.uci() for move in self.board.legal_moves]
+
+    def make_move(self, move_str):
+        move = chess.Move.from_uci(move_str)
+        if move in self.board.legal_moves:
+            self.board.push(move)
+            self.move_history.append(move_str)
+            return True
+        return False
+
+    def is_game_over(self):
+        return self.board.is_game_over()
+
+    def is_check(self):
+        return self.board.is_check()
+
+    def compute_game_result(self):
+        if self.board.is_checkmate():
+            return "Black wins by checkmate" if self.board.turn == chess.WHITE else "White wins by checkmate"
+        elif self.board.is_stalemate():
+            return "Draw by stalemate"
+        elif self.board.is_insufficient_material():
+            return "Draw by insufficient material"
+        elif self.board.is_seventyfive_moves():
+            return "Draw by 75-move rule"
+        elif self.board.is_fivefold_repetition():
+            return "Draw by fivefold repetition"
+        return "Game continues"
+
+    def get_game_result(self):
+        return self.compute_game_result()
+
+
+def play_like_game_loop(game, rng):
+    plies = 0
+    while not game.is_game_over():
+        game.current_turn
+        game.get_fen()
+        valid_moves = game.get_legal_moves()
+        game.make_move(rng.choice(valid_moves))
+        game.get_board()
+        game.is_check()
+        if game.is_game_over():
+            game.get_game_result()
+        plies += 1
+    return plies
+
+
+def bench_chess_game(game_class, games, seed):
+    rng = random.Random(seed)
+    plies = 0
+    started = time.perf_counter()
+    for _ in range(games):
+        plies += play_like_game_loop(game_class(), rng)
+    elapsed = time.perf_counter() - started
+    return {
+        "games": games,
+        "plies": plies,
+        "seconds": elapsed,
+        "us_per_ply": elapsed / plies * 1e6 if plies else 0.0,
+    }
+
+
+def bench_end_to_end(games, concurrency, seed, batch_window=None, batch_size=8, **mock_options):
+    client = OpenRouterClient("benchmark")
+    backend = install_mock_backend(client, seed=seed, **mock_options)
+    # Retry like a real run, but without pacing or long backoff so the mock's throughput is what gets measured
+    client = RequestScheduler(client, rate=1e9, burst=10 ** 9, max_concurrency=concurrency,
+                              base_delay=0.001, max_delay=0.01)
+    if batch_window is not None:
+        client = MoveBatcher(client, window=batch_window, max_batch_size=batch_size)
+    runner = TournamentRunner(client, ["stub/first-move", "stub/random-move"],
+                              games_per_pair=games, concurrency=concurrency)
+    random.seed(seed)
+    report = runner.run()
+    plies = sum(record["plies"] for record in runner.games)
+    return {
+        "games": report["games"],
+        "plies": plies,
+        "concurrency": concurrency,
+        "latency": repr(backend.latency),
+        "seconds": report["elapsed"],
+        "games_per_sec": report["games"] / report["elapsed"] if report["elapsed"] else 0.0,
+        "plies_per_sec": plies / report["elapsed"] if report["elapsed"] else 0.0,
+        "fallbacks": sum(record["fallbacks"] for record in runner.games),
+        "retries": sum(row["retries"] for row in report["requests"].values()),
+        "requests_per_game": backend.stats()["requests"] / report["games"] if report["games"] else 0.0,
+        "backend": backend.stats(),
+        "batching": report.get("batching"),
+    }
+
+
+def parser_corpus(positions, seed):
+    rng = random.Random(seed)
+    corpus = []
+    game = ChessGame()
+    while len(corpus) < positions:
+        if game.is_game_over():
+            game = ChessGame()
+        legal_moves = game.get_legal_moves()
+        board_fen = game.get_fen()
+        move = rng.choice(legal_moves)
+        san = game.board.san(chess.Move.from_uci(move))
+        corpus.append((move, legal_moves, board_fen))
+        corpus.append((san, legal_moves, board_fen))
+        corpus.append((rng.choice(VERBOSE_TEMPLATES).format(move=move), legal_moves, board_fen))
+        corpus.append((rng.choice(DECOY_TEMPLATES).format(move=move, decoy=rng.choice(legal_moves)),
+                       legal_moves, board_fen))
+        corpus.append(("I am not sure what to play here.", legal_moves, board_fen))
+        game.make_move(move)
+    return corpus
+
+
+def streamed_move(text, legal_moves, board_fen):
+    parser = StreamingMoveParser(legal_moves, board_fen)
+    for token in re.findall(r"\S*\s*", text):
+        move = parser.feed(token)
+        if move is not None:
+            return move
+    return parser.finish().move
+
+
+def bench_parser(positions, seed):
+    client = OpenRouterClient()
+    corpus = parser_corpus(positions, seed)
+    parsed = 0
+    started = time.perf_counter()
+    for text, legal_moves, board_fen in corpus:
+        parsed += client.extract_move_from_response(text, legal_moves, board_fen) is not None
+    elapsed = time.perf_counter() - started
+    stream_mismatches = sum(
+        streamed_move(text, legal_moves, board_fen) != client.extract_move_from_response(text, legal_moves, board_fen)
+        for text, legal_moves, board_fen in corpus
+    )
+    return {
+        "calls": len(corpus),
+        "parsed": parsed,
+        "seconds": elapsed,
+        "us_per_call": elapsed / len(corpus) * 1e6,
+        "stream_mismatches": stream_mismatches,
+    }
+
+
+def bench_gui(redraws, seed):
+    try:
+        from main import ChessArenaApp
+        app = ChessArenaApp()
+    except Exception as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+
+    try:
+        app.root.withdraw()
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        for _ in range(redraws):
+            if app.game.is_game_over():
+                app.game.reset()
+            app.game.make_move(rng.choice(app.game.get_legal_moves()))
+            app.draw_pieces()
+            app.root.update_idletasks()
+        draw_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(max(1, redraws // 10)):
+            app.setup_chess_board()
+            app.root.update_idletasks()
+        setup_elapsed = time.perf_counter() - started
+        return {
+            "redraws": redraws,
+            "draw_pieces_ms": draw_elapsed / redraws * 1e3,
+            "setup_chess_board_ms": setup_elapsed / max(1, redraws // 10) * 1e3,
+        }
+    finally:
+        app.root.destroy()
+
+
+def run_benchmarks(games=200, seed=0, e2e_games=4, concurrency=4, latency="fixed:0", error_rate=0.0,
+                   malformed_rate=0.0, verbose_rate=0.0, parser_positions=2000, redraws=200,
+                   batch_window=None, batch_size=8):
+    recomputing = bench_chess_game(RecomputingChessGame, games, seed)
+    cached = bench_chess_game(ChessGame, games, seed)
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "chess": chess.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+        },
+        "end_to_end": bench_end_to_end(e2e_games, concurrency, seed, latency=latency, error_rate=error_rate,
+                                       malformed_rate=malformed_rate, verbose_rate=verbose_rate,
+                                       batch_window=batch_window, batch_size=batch_size),
+        "chess_game": {
+            "recomputing": recomputing,
+            "cached": cached,
+            "speedup": recomputing["us_per_ply"] / cached["us_per_ply"] if cached["us_per_ply"] else 0.0,
+        },
+        "parser": bench_parser(parser_positions, seed),
+        "gui": bench_gui(redraws, seed),
+    }
+
+
+def metric(results, path):
+    value = results
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for path, higher_is_better in REGRESSION_METRICS:
+        current, previous = metric(results, path), metric(baseline, path)
+        if current is None or previous is None or not previous:
+            continue
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append({"metric": path, "baseline": previous, "current": current, "change": change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the AI Chess Arena hot path with a mock LLM backend")
+    parser.add_argument("--games", type=int, default=200, help="Random games per ChessGame micro-benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--e2e-games", type=int, default=4, help="Games in the end-to-end run, with colours alternating")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="Mock latency: fixed:S, uniform:LO,HI, exponential:MEAN or lognormal:MU,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock responses that are HTTP 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of mock responses with broken JSON")
+    parser.add_argument("--verbose-rate", type=float, default=0.0, help="Share of chatty mock responses")
+    parser.add_argument("--batch-window", type=float, default=None,
+                        help="Batch move requests in the end-to-end run with this window in seconds")
+    parser.add_argument("--batch-size", type=int, default=8, help="Maximum positions per batch")
+    parser.add_argument("--parser-positions", type=int, default=2000)
+    parser.add_argument("--redraws", type=int, default=200, help="GUI redraws (skipped without a display)")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file")
+    parser.add_argument("--baseline", default=None, help="Compare against a previous JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown vs the baseline")
+    args = parser.parse_args(argv)
+
+    configure_logging("ERROR")
+
+    results = run_benchmarks(
+        games=args.games, seed=args.seed, e2e_games=args.e2e_games, concurrency=args.concurrency,
+        latency=args.latency, error_rate=args.error_rate, malformed_rate=args.malformed_rate,
+        verbose_rate=args.verbose_rate, parser_positions=args.parser_positions, redraws=args.redraws,
+        batch_window=args.batch_window, batch_size=args.batch_size,
+    )
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            results["regressions"] = find_regressions(results, json.load(f), args.tolerance)
+    if results["parser"]["stream_mismatches"]:
+        results.setdefault("regressions", []).append(
+            {"metric": "parser.stream_mismatches", "current": results["parser"]["stream_mismatches"]})
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
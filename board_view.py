@@ -0,0 +1,76 @@
+PIECE_SYMBOLS = {
+    'K': '♔', 'Q': '♕', 'R': '♖', 'B': '♗', 'N': '♘', 'P': '♙',
+    'k': '♚', 'q': '♛', 'r': '♜', 'b': '♝', 'n': '♞', 'p': '♟'
+}
+
+SQUARE_COLORS = ["#F0D9B5", "#B58863"]
+
+
+class BoardView:
+    def __init__(self, canvas, square_size=80, x=0, y=0, coordinates=True, tag="board"):
+        self.canvas = canvas
+        self.square_size = square_size
+        self.x = x
+        self.y = y
+        self.coordinates = coordinates
+        self.tag = tag
+        self.font = ("Arial", max(6, int(square_size * 0.6)))
+        self.pieces = {}
+        self.squares_drawn = False
+
+    def center(self, row, col):
+        half = self.square_size / 2
+        return self.x + col * self.square_size + half, self.y + row * self.square_size + half
+
+    def draw_squares(self):
+        size = self.square_size
+        for row in range(8):
+            for col in range(8):
+                x1, y1 = self.x + col * size, self.y + row * size
+                self.canvas.create_rectangle(x1, y1, x1 + size, y1 + size, fill=SQUARE_COLORS[(row + col) % 2],
+                                             outline="", tags=(self.tag, f"{self.tag}-square"))
+
+        if self.coordinates:
+            label_font = ("Arial", max(6, size * 3 // 20))
+            for row in range(8):
+                self.canvas.create_text(self.x + 10, self.center(row, 0)[1], text=str(8 - row),
+                                        font=label_font, tags=self.tag)
+            for col in range(8):
+                self.canvas.create_text(self.center(0, col)[0], self.y + 8 * size + 10,
+                                        text=chr(ord('a') + col), font=label_font, tags=self.tag)
+        self.squares_drawn = True
+
+    def render(self, board):
+        if not self.squares_drawn:
+            self.draw_squares()
+
+        changed = 0
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                current = self.pieces.get((row, col))
+                if current is not None and current[1] == piece:
+                    continue
+                if piece == '.':
+                    if current is not None:
+                        self.canvas.delete(current[0])
+                        del self.pieces[(row, col)]
+                        changed += 1
+                    continue
+
+                symbol = PIECE_SYMBOLS.get(piece, piece)
+                if current is not None:
+                    self.canvas.itemconfigure(current[0], text=symbol)
+                    item = current[0]
+                else:
+                    x, y = self.center(row, col)
+                    item = self.canvas.create_text(x, y, text=symbol, font=self.font,
+                                                   tags=(self.tag, "piece", f"{self.tag}-piece"))
+                self.pieces[(row, col)] = (item, piece)
+                changed += 1
+        return changed
+
+    def clear(self):
+        self.canvas.delete(self.tag)
+        self.pieces = {}
+        self.squares_drawn = False
@@ -1,68 +1,108 @@
 import chess
 import chess.engine
+import chess.pgn
+
+def fen_to_board(fen):
+    board_array = []
+    for rank in fen.split(' ', 1)[0].split('/'):
+        row = []
+        for symbol in rank:
+            if symbol.isdigit():
+                row.extend('.' * int(symbol))
+            else:
+                row.append(symbol)
+        board_array.append(row)
+    return board_array
 
 class ChessGame:
-    def __init__(self):
-        self.board = chess.Board()
-        self.move_history = []
+    def __init__(self, fen=None):
+        self.reset(fen)
         
-    def reset(self):
-        self.board = chess.Board()
+    def reset(self, fen=None):
+        self.starting_fen = fen or chess.STARTING_FEN
+        self.board = chess.Board(self.starting_fen)
         self.move_history = []
+        self.san_board = chess.Board(self.starting_fen)
+        self.san_history = []
+        self.position = {}
+        
+    def legal_move_map(self):
+        legal = self.position.get('legal')
+        if legal is None:
+            legal = self.position['legal'] = {move.uci(): move for move in self.board.legal_moves}
+        return legal
         
     def get_board(self):
-        board_array = []
-        for rank in range(8):
-            row = []
-            for file in range(8):
-                square = chess.square(file, 7-rank)
-                piece = self.board.piece_at(square)
-                if piece is None:
-                    row.append('.')
-                else:
-                    row.append(piece.symbol())
-            board_array.append(row)
-        return board_array
+        board_array = self.position.get('board')
+        if board_array is None:
+            board_array = self.position['board'] = fen_to_board(self.get_fen())
+        return [row[:] for row in board_array]
         
     def get_fen(self):
-        return self.board.fen()
+        fen = self.position.get('fen')
+        if fen is None:
+            fen = self.position['fen'] = self.board.fen()
+        return fen
         
     def get_legal_moves(self):
-        return [move.uci() for move in self.board.legal_moves]
+        return list(self.legal_move_map())
         
     def make_move(self, move_str):
         try:
-            move = chess.Move.from_uci(move_str)
-            if move in self.board.legal_moves:
-                self.board.push(move)
-                self.move_history.append(move_str)
-                return True
-            return False
+            move = self.legal_move_map().get(move_str)
+            if move is None:
+                move = chess.Move.from_uci(move_str)
+                if move not in self.board.legal_moves:
+                    return False
+            self.board.push(move)
+            self.move_history.append(move_str)
+            self.position = {}
+            return True
         except:
             return False
             
     def is_game_over(self):
-        return self.board.is_game_over()
+        return self.get_game_result() != "Game continues"
         
     def is_check(self):
-        return self.board.is_check()
+        check = self.position.get('check')
+        if check is None:
+            check = self.position['check'] = self.board.is_check()
+        return check
         
     def get_game_result(self):
-        if self.board.is_checkmate():
+        result = self.position.get('result')
+        if result is None:
+            result = self.position['result'] = self.compute_game_result()
+        return result
+        
+    def compute_game_result(self):
+        has_moves = bool(self.legal_move_map())
+        if not has_moves and self.is_check():
             if self.board.turn == chess.WHITE:
                 return "Black wins by checkmate"
             else:
                 return "White wins by checkmate"
-        elif self.board.is_stalemate():
+        elif not has_moves:
             return "Draw by stalemate"
         elif self.board.is_insufficient_material():
             return "Draw by insufficient material"
-        elif self.board.is_seventyfive_moves():
+        elif self.board.halfmove_clock >= 150:
             return "Draw by 75-move rule"
         elif self.board.is_fivefold_repetition():
             return "Draw by fivefold repetition"
         else:
             return "Game continues"
+
+    def get_result(self):
+        result = self.get_game_result()
+        if result == "Game continues":
+            return "*"
+        elif result == "White wins by checkmate":
+            return "1-0"
+        elif result == "Black wins by checkmate":
+            return "0-1"
+        return "1/2-1/2"
             
     @property
     def current_turn(self):
@@ -71,17 +111,27 @@ class ChessGame:
     def get_move_history(self):
         return self.move_history.copy()
         
+    def get_movetext(self):
+        movetext = self.position.get('movetext')
+        if movetext is None:
+            board = self.san_board
+            for move in self.board.move_stack[len(board.move_stack):]:
+                if board.turn == chess.WHITE:
+                    number = f"{board.fullmove_number}. "
+                else:
+                    number = "" if self.san_history else f"{board.fullmove_number}... "
+                self.san_history.append(number + board.san_and_push(move))
+            movetext = " ".join(self.san_history)
+            if self.starting_fen != chess.STARTING_FEN:
+                movetext = f'[FEN "{self.starting_fen}"] {movetext}'.rstrip()
+            self.position['movetext'] = movetext
+        return movetext
+        
     def get_board_notation(self):
         return str(self.board)
         
-    def get_pgn(self):
-        game = chess.pgn.Game()
-        node = game
-        
-        temp_board = chess.Board()
-        for move_str in self.move_history:
-            move = chess.Move.from_uci(move_str)
-            node = node.add_variation(move)
-            temp_board.push(move)
-            
+    def get_pgn(self, headers=None):
+        game = chess.pgn.Game.from_board(self.board)
+        for name, value in (headers or {}).items():
+            game.headers[name] = value
         return str(game)
@@ -0,0 +1,236 @@
+import argparse
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+import chess
+import chess.pgn
+
+RESULT_CODES = {"*": 0, "1-0": 1, "0-1": 2, "1/2-1/2": 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+INDEX_RECORD = struct.Struct("<QQIQIHHBHfQ")
+MOVE_COUNT = struct.Struct("<H")
+
+IndexEntry = namedtuple(
+    "IndexEntry",
+    "game_id pgn_offset pgn_length moves_offset moves_length white black result plies duration fen_offset",
+)
+
+
+def encode_moves(moves, board=None):
+    board = board or chess.Board()
+    encoded = bytearray(MOVE_COUNT.pack(len(moves)))
+    for uci in moves:
+        move = chess.Move.from_uci(uci)
+        legal = sorted(board.legal_moves, key=chess.Move.uci)
+        encoded.append(legal.index(move))
+        board.push(move)
+    return bytes(encoded)
+
+
+def decode_moves(data, board=None):
+    board = board or chess.Board()
+    (count,) = MOVE_COUNT.unpack_from(data)
+    moves = []
+    for index in data[MOVE_COUNT.size:MOVE_COUNT.size + count]:
+        move = sorted(board.legal_moves, key=chess.Move.uci)[index]
+        moves.append(move.uci())
+        board.push(move)
+    return moves
+
+
+def record_to_pgn(record):
+    board = chess.Board(record.get("start_fen") or chess.STARTING_FEN)
+    for uci in record["moves"]:
+        board.push_uci(uci)
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "AI Chess Arena"
+    game.headers["Site"] = "OpenRouter"
+    game.headers["Date"] = time.strftime("%Y.%m.%d", time.gmtime(record.get("started_at", time.time())))
+    game.headers["Round"] = str(record.get("round", "-"))
+    game.headers["White"] = record["white"]
+    game.headers["Black"] = record["black"]
+    game.headers["Result"] = record["result"]
+    game.headers["Termination"] = record["termination"]
+    game.headers["PlyCount"] = str(record["plies"])
+    game.headers["GameId"] = str(record["game_id"])
+    game.headers["Duration"] = f"{record['duration']:.2f}"
+    game.headers["Fallbacks"] = str(record["fallbacks"])
+    if record.get("fallback_plies"):
+        game.headers["FallbackPlies"] = ",".join(map(str, record["fallback_plies"]))
+    if record.get("book_plies"):
+        game.headers["BookPlies"] = str(record["book_plies"])
+    if record.get("opening"):
+        game.headers["Opening"] = record["opening"]
+    return str(game)
+
+
+class GameArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+
+        self.pgn_path = os.path.join(directory, "games.pgn")
+        self.moves_path = os.path.join(directory, "moves.bin")
+        self.index_path = os.path.join(directory, "index.bin")
+        self.models_path = os.path.join(directory, "models.txt")
+        self.fens_path = os.path.join(directory, "fens.txt")
+
+        self.models = []
+        if os.path.exists(self.models_path):
+            with open(self.models_path, "r", encoding="utf-8") as f:
+                self.models = [line.rstrip("\n") for line in f]
+        self.model_ids = {model: i for i, model in enumerate(self.models)}
+
+        self.pgn_file = open(self.pgn_path, "ab")
+        self.moves_file = open(self.moves_path, "ab")
+        self.index_file = open(self.index_path, "ab")
+        self.models_file = open(self.models_path, "a", encoding="utf-8")
+        self.fens_file = open(self.fens_path, "ab")
+        self.entries = None
+        self.numbers_by_game_id = None
+        self.count = os.path.getsize(self.index_path) // INDEX_RECORD.size if os.path.exists(self.index_path) else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def model_id(self, model):
+        if model not in self.model_ids:
+            self.model_ids[model] = len(self.models)
+            self.models.append(model)
+            self.models_file.write(model + "\n")
+            self.models_file.flush()
+        return self.model_ids[model]
+
+    def append(self, record):
+        pgn = (record_to_pgn(record) + "\n\n").encode("utf-8")
+        start_fen = record.get("start_fen")
+        moves = encode_moves(record["moves"], chess.Board(start_fen) if start_fen else None)
+
+        with self.lock:
+            pgn_offset = self.pgn_file.tell()
+            moves_offset = self.moves_file.tell()
+            self.pgn_file.write(pgn)
+            self.moves_file.write(moves)
+            # 0 means the standard start; otherwise one past the FEN's offset in fens.txt
+            fen_offset = 0
+            if start_fen:
+                fen_offset = self.fens_file.tell() + 1
+                self.fens_file.write((start_fen + "\n").encode("utf-8"))
+                self.fens_file.flush()
+
+            entry = IndexEntry(
+                record["game_id"], pgn_offset, len(pgn), moves_offset, len(moves),
+                self.model_id(record["white"]), self.model_id(record["black"]),
+                RESULT_CODES.get(record["result"], 0), record["plies"], record["duration"], fen_offset,
+            )
+            number = self.count
+            self.count += 1
+            self.pgn_file.flush()
+            self.moves_file.flush()
+            self.index_file.write(INDEX_RECORD.pack(*entry))
+            self.index_file.flush()
+
+            if self.entries is not None:
+                self.entries[number] = entry
+                self.numbers_by_game_id.setdefault(entry.game_id, []).append(number)
+        return number
+
+    def index(self):
+        with self.lock:
+            if self.entries is None:
+                with open(self.index_path, "rb") as f:
+                    data = f.read()
+                usable = len(data) - len(data) % INDEX_RECORD.size
+                self.entries = {
+                    number: IndexEntry(*fields)
+                    for number, fields in enumerate(INDEX_RECORD.iter_unpack(data[:usable]))
+                }
+                # Game ids restart with every run, so one id can map to several archived games
+                self.numbers_by_game_id = {}
+                for number, entry in self.entries.items():
+                    self.numbers_by_game_id.setdefault(entry.game_id, []).append(number)
+            return self.entries
+
+    def find(self, model=None, result=None, game_id=None):
+        model_id = self.model_ids.get(model, -1) if model is not None else None
+        result_code = RESULT_CODES[result] if result is not None else None
+        entries = self.index()
+        numbers = entries if game_id is None else self.numbers_by_game_id.get(game_id, [])
+        matches = []
+        for number in numbers:
+            entry = entries[number]
+            if model_id is not None and model_id not in (entry.white, entry.black):
+                continue
+            if result_code is not None and entry.result != result_code:
+                continue
+            matches.append((number, entry))
+        return matches
+
+    def describe(self, entry):
+        return {
+            "game_id": entry.game_id,
+            "white": self.models[entry.white],
+            "black": self.models[entry.black],
+            "result": RESULTS[entry.result],
+            "plies": entry.plies,
+            "duration": entry.duration,
+        }
+
+    def start_fen(self, number):
+        entry = self.index()[number]
+        if not entry.fen_offset:
+            return None
+        with open(self.fens_path, "rb") as f:
+            f.seek(entry.fen_offset - 1)
+            return f.readline().decode("utf-8").rstrip("\n")
+
+    def read_moves(self, number):
+        entry = self.index()[number]
+        start_fen = self.start_fen(number)
+        with open(self.moves_path, "rb") as f:
+            f.seek(entry.moves_offset)
+            return decode_moves(f.read(entry.moves_length), chess.Board(start_fen) if start_fen else None)
+
+    def read_pgn(self, number):
+        entry = self.index()[number]
+        with open(self.pgn_path, "rb") as f:
+            f.seek(entry.pgn_offset)
+            return f.read(entry.pgn_length).decode("utf-8").strip()
+
+    def close(self):
+        with self.lock:
+            for f in (self.pgn_file, self.moves_file, self.index_file, self.models_file, self.fens_file):
+                f.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query an AI Chess Arena game archive")
+    parser.add_argument("directory")
+    parser.add_argument("--model", default=None, help="Only games played by this model")
+    parser.add_argument("--result", choices=sorted(RESULT_CODES), default=None)
+    parser.add_argument("--game-id", type=int, default=None, help="Only games with this tournament game id")
+    parser.add_argument("--pgn", type=int, default=None, metavar="NUMBER",
+                        help="Print the PGN of one game, by its number in the archive")
+    args = parser.parse_args(argv)
+
+    with GameArchive(args.directory) as archive:
+        if args.pgn is not None:
+            print(archive.read_pgn(args.pgn))
+            return
+        for number, entry in archive.find(args.model, args.result, args.game_id):
+            game = archive.describe(entry)
+            print(f"{number:>8} {game['game_id']:>8} {game['result']:>7} {game['plies']:>4} plies  "
+                  f"{game['white']} vs {game['black']}")
+
+
+if __name__ == "__main__":
+    main()
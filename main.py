@@ -1,10 +1,248 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import argparse
 import json
+import os
+import queue
 import threading
 import time
-from chess_engine import ChessGame
+from collections import deque
+import chess
+from arena_logging import configure_logging
+from board_view import BoardView
+from chess_engine import ChessGame, fen_to_board
+from model_catalog import ModelCatalog
 from openrouter_client import OpenRouterClient
+from scheduler import RequestScheduler
+from tournament import TournamentRunner, build_client, load_api_key
+
+FRAME_RATE = 30
+MAX_LOG_LINES = 1000
+DASHBOARD_COLUMNS = 6
+MINI_SQUARE_SIZE = 20
+LEADERBOARD_ROWS = 5
+LATENCY_WINDOW = 500
+DEFAULT_MODELS = [
+    "openai/gpt-3.5-turbo",
+    "meta-llama/llama-2-70b-chat",
+    "anthropic/claude-3-haiku",
+    "mistralai/mistral-7b-instruct",
+    "google/gemma-7b-it"
+]
+
+class MiniBoard:
+    def __init__(self, parent, square_size=MINI_SQUARE_SIZE):
+        self.frame = tk.Frame(parent, bd=1, relief=tk.GROOVE)
+        self.title_var = tk.StringVar(value="Waiting...")
+        tk.Label(self.frame, textvariable=self.title_var, font=("Arial", 8, "bold"), anchor=tk.W,
+                 width=square_size * 8 // 6).pack(fill=tk.X)
+        
+        self.canvas = tk.Canvas(self.frame, width=square_size * 8, height=square_size * 8, highlightthickness=0)
+        self.canvas.pack()
+        self.view = BoardView(self.canvas, square_size=square_size, coordinates=False)
+        
+        self.status_var = tk.StringVar(value="")
+        tk.Label(self.frame, textvariable=self.status_var, font=("Arial", 8), anchor=tk.W).pack(fill=tk.X)
+        
+        self.game_id = None
+        self.fen = chess.STARTING_FEN
+        self.status = ""
+        self.finished = True
+        self.dirty = True
+        
+    def assign(self, game_id, white, black, fen=chess.STARTING_FEN):
+        self.game_id = game_id
+        self.finished = False
+        self.fen = fen
+        self.status = "Starting..."
+        self.title_var.set(f"#{game_id} {white.split('/')[-1]} vs {black.split('/')[-1]}")
+        self.dirty = True
+        
+    def update(self, event):
+        self.fen = event["fen"]
+        self.status = f"Ply {event['ply']}: {event['move']}" + (" (fallback)" if event["fallback"] else "")
+        self.dirty = True
+        
+    def finish(self, event):
+        self.finished = True
+        self.status = f"{event['result']} - {event['termination']}"
+        self.dirty = True
+        
+    def render(self):
+        if not self.dirty:
+            return
+        self.view.render(fen_to_board(self.fen))
+        self.status_var.set(self.status)
+        self.dirty = False
+
+class SpectatorDashboard:
+    def __init__(self, parent, client, models, games_per_pair=2, concurrency=8):
+        self.window = tk.Toplevel(parent)
+        self.window.title("AI Chess Arena - Tournament Dashboard")
+        self.window.geometry("1100x750")
+        
+        self.client = client
+        self.events = queue.Queue()
+        self.runner = None
+        self.closed = False
+        self.tiles = []
+        self.tiles_by_game = {}
+        self.free_tiles = deque()
+        self.started = None
+        self.finished_at = None
+        self.counters = {"started": 0, "finished": 0, "plies": 0, "fallbacks": 0, "latency": 0.0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.rated_games = 0
+        
+        self.setup_ui(models, games_per_pair, concurrency)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.after(1000 // FRAME_RATE, self.refresh)
+        
+    def setup_ui(self, models, games_per_pair, concurrency):
+        control_frame = tk.Frame(self.window)
+        control_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        tk.Label(control_frame, text="Models (comma separated):").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.models_var = tk.StringVar(value=", ".join(models))
+        tk.Entry(control_frame, textvariable=self.models_var, width=70).grid(row=0, column=1, columnspan=5, sticky=tk.W)
+        
+        tk.Label(control_frame, text="Games per pair:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5))
+        self.games_var = tk.StringVar(value=str(games_per_pair))
+        tk.Spinbox(control_frame, from_=1, to=1000, textvariable=self.games_var, width=6).grid(row=1, column=1, sticky=tk.W)
+        
+        tk.Label(control_frame, text="Concurrent games:").grid(row=1, column=2, sticky=tk.W, padx=(10, 5))
+        self.concurrency_var = tk.StringVar(value=str(concurrency))
+        tk.Spinbox(control_frame, from_=1, to=500, textvariable=self.concurrency_var, width=6).grid(row=1, column=3, sticky=tk.W)
+        
+        tk.Button(control_frame, text="Start", command=self.start, bg="#4CAF50", fg="white").grid(row=1, column=4, padx=5)
+        tk.Button(control_frame, text="Stop", command=self.stop, bg="#f44336", fg="white").grid(row=1, column=5, padx=5)
+        
+        self.stats_var = tk.StringVar(value="Idle")
+        tk.Label(self.window, textvariable=self.stats_var, font=("Courier", 10), fg="blue", anchor=tk.W).pack(fill=tk.X, padx=10)
+        self.leaderboard_var = tk.StringVar(value="")
+        tk.Label(self.window, textvariable=self.leaderboard_var, font=("Courier", 10), anchor=tk.W,
+                 justify=tk.LEFT).pack(fill=tk.X, padx=10)
+        
+        grid_frame = tk.Frame(self.window)
+        grid_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        self.grid_canvas = tk.Canvas(grid_frame, highlightthickness=0)
+        scrollbar = tk.Scrollbar(grid_frame, orient=tk.VERTICAL, command=self.grid_canvas.yview)
+        self.grid_canvas.configure(yscrollcommand=scrollbar.set)
+        self.grid_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.grid = tk.Frame(self.grid_canvas)
+        self.grid_canvas.create_window((0, 0), window=self.grid, anchor=tk.NW)
+        self.grid.bind("<Configure>", lambda event: self.grid_canvas.configure(scrollregion=self.grid_canvas.bbox("all")))
+        
+    def start(self):
+        if self.runner is not None and self.finished_at is None:
+            messagebox.showinfo("Dashboard", "A tournament is already running", parent=self.window)
+            return
+            
+        models = [model.strip() for model in self.models_var.get().split(",") if model.strip()]
+        try:
+            self.runner = TournamentRunner(self.client, models, games_per_pair=int(self.games_var.get()),
+                                           concurrency=int(self.concurrency_var.get()), on_event=self.events.put)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e), parent=self.window)
+            return
+            
+        self.started = time.time()
+        self.finished_at = None
+        self.rated_games = 0
+        threading.Thread(target=self.run_tournament, args=(self.runner,), daemon=True).start()
+        
+    def run_tournament(self, runner):
+        try:
+            report = runner.run()
+            self.events.put({"event": "tournament_finished", "games": report["games"]})
+        except Exception as e:
+            self.events.put({"event": "tournament_failed", "error": str(e)})
+            
+    def stop(self):
+        if self.runner is not None:
+            self.runner.stop()
+            
+    def close(self):
+        self.stop()
+        self.closed = True
+        self.window.destroy()
+        
+    def tile_for_new_game(self):
+        if self.free_tiles:
+            return self.free_tiles.popleft()
+        tile = MiniBoard(self.grid)
+        index = len(self.tiles)
+        tile.frame.grid(row=index // DASHBOARD_COLUMNS, column=index % DASHBOARD_COLUMNS, padx=3, pady=3)
+        self.tiles.append(tile)
+        return tile
+        
+    def handle(self, event):
+        kind = event["event"]
+        if kind == "game_started":
+            tile = self.tile_for_new_game()
+            tile.assign(event["game_id"], event["white"], event["black"], event.get("fen", chess.STARTING_FEN))
+            self.tiles_by_game[event["game_id"]] = tile
+            self.counters["started"] += 1
+        elif kind == "move":
+            self.counters["plies"] += 1
+            self.counters["fallbacks"] += event["fallback"]
+            self.counters["latency"] += event["latency"]
+            self.latencies.append(event["latency"])
+            tile = self.tiles_by_game.get(event["game_id"])
+            if tile is not None:
+                tile.update(event)
+        elif kind == "game_finished":
+            self.counters["finished"] += 1
+            tile = self.tiles_by_game.pop(event["game_id"], None)
+            if tile is not None:
+                tile.finish(event)
+                self.free_tiles.append(tile)
+        elif kind in ("tournament_finished", "tournament_failed"):
+            self.finished_at = time.time()
+            if kind == "tournament_failed":
+                messagebox.showerror("Error", f"Tournament failed:\n{event['error']}", parent=self.window)
+                
+    def refresh(self):
+        if self.closed:
+            return
+            
+        while True:
+            try:
+                self.handle(self.events.get_nowait())
+            except queue.Empty:
+                break
+                
+        for tile in self.tiles:
+            tile.render()
+            
+        if self.started is not None:
+            self.stats_var.set(self.format_stats())
+        if self.runner is not None and self.rated_games != len(self.runner.games):
+            self.rated_games = len(self.runner.games)
+            self.leaderboard_var.set(self.format_leaderboard())
+        self.window.after(1000 // FRAME_RATE, self.refresh)
+        
+    def format_stats(self):
+        counters = self.counters
+        elapsed = max((self.finished_at or time.time()) - self.started, 1e-9)
+        live = counters["started"] - counters["finished"]
+        mean_latency = counters["latency"] / counters["plies"] if counters["plies"] else 0.0
+        recent = sorted(self.latencies)
+        p95 = recent[int(len(recent) * 0.95)] if recent else 0.0
+        state = "finished" if self.finished_at else "running"
+        return (f"{state} {elapsed:6.0f}s | games {counters['finished']} done, {live} live "
+                f"({counters['finished'] / elapsed * 3600:.0f}/h) | plies {counters['plies']} "
+                f"({counters['plies'] / elapsed:.1f}/s) | latency mean {mean_latency * 1000:.0f} ms, "
+                f"p95 {p95 * 1000:.0f} ms | fallbacks {counters['fallbacks']}")
+
+    def format_leaderboard(self):
+        rows = self.runner.ratings.leaderboard()[:LEADERBOARD_ROWS]
+        return "\n".join(f"{rank:>2}. {row['model']:<40} Elo {row['elo']:6.0f}  Glicko {row['glicko']:6.0f} "
+                         f"\u00b1{2 * row['deviation']:.0f}  ({row['games']} games)"
+                         for rank, row in enumerate(rows, 1))
 
 class ChessArenaApp:
     def __init__(self):
@@ -15,9 +253,15 @@ class ChessArenaApp:
         
         self.game = ChessGame()
         self.client = OpenRouterClient()
+        self.scheduler = RequestScheduler(self.client)
+        self.catalog = ModelCatalog(self.client)
         self.game_running = False
         self.move_delay = 2.0
         
+        self.pending_log = deque(maxlen=MAX_LOG_LINES)
+        self.pending_status = None
+        self.pending_board = None
+        
         self.setup_ui()
         self.load_config()
         
@@ -62,12 +306,14 @@ class ChessArenaApp:
         tk.Button(button_frame, text="Stop Game", command=self.stop_game, bg="#f44336", fg="white").pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Reset Board", command=self.reset_board, bg="#2196F3", fg="white").pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Test API", command=self.test_api, bg="#FF9800", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Tournament Dashboard", command=self.open_dashboard, bg="#9C27B0", fg="white").pack(side=tk.LEFT, padx=5)
         
         game_frame = tk.Frame(main_frame)
         game_frame.pack(fill=tk.BOTH, expand=True)
         
         self.canvas = tk.Canvas(game_frame, bg="white", width=640, height=640)
         self.canvas.pack(side=tk.LEFT, padx=(0, 10))
+        self.board_view = BoardView(self.canvas, square_size=80)
         
         info_frame = tk.Frame(game_frame)
         info_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
@@ -93,56 +339,44 @@ class ChessArenaApp:
         
         self.setup_chess_board()
         self.load_models()
+        self.root.after(1000 // FRAME_RATE, self.refresh)
         
     def setup_chess_board(self):
-        self.canvas.delete("all")
-        square_size = 80
-        
-        colors = ["#F0D9B5", "#B58863"]
-        
-        for row in range(8):
-            for col in range(8):
-                color = colors[(row + col) % 2]
-                x1, y1 = col * square_size, row * square_size
-                x2, y2 = x1 + square_size, y1 + square_size
-                self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-                
-        for row in range(8):
-            self.canvas.create_text(10, row * square_size + 40, text=str(8-row), font=("Arial", 12))
-            
-        for col in range(8):
-            self.canvas.create_text(col * square_size + 40, 650, text=chr(ord('a') + col), font=("Arial", 12))
-        
+        if not self.board_view.squares_drawn:
+            self.board_view.draw_squares()
         self.draw_pieces()
         
-    def draw_pieces(self):
-        piece_symbols = {
-            'K': '♔', 'Q': '♕', 'R': '♖', 'B': '♗', 'N': '♘', 'P': '♙',
-            'k': '♚', 'q': '♛', 'r': '♜', 'b': '♝', 'n': '♞', 'p': '♟'
-        }
+    def draw_pieces(self, board=None):
+        self.board_view.render(board or self.game.get_board())
         
-        self.canvas.delete("piece")
-        
-        board = self.game.get_board()
-        square_size = 80
-        
-        for row in range(8):
-            for col in range(8):
-                piece = board[row][col]
-                if piece != '.':
-                    x = col * square_size + 40
-                    y = row * square_size + 40
-                    symbol = piece_symbols.get(piece, piece)
-                    self.canvas.create_text(x, y, text=symbol, font=("Arial", 48), tags="piece")
+    def refresh(self):
+        board, self.pending_board = self.pending_board, None
+        if board is not None:
+            self.draw_pieces(board)
+            
+        status, self.pending_status = self.pending_status, None
+        if status is not None:
+            self.status_var.set(status)
+            
+        self.flush_log()
+        self.root.after(1000 // FRAME_RATE, self.refresh)
+        
+    def flush_log(self):
+        lines = []
+        while self.pending_log:
+            lines.append(self.pending_log.popleft())
+        if not lines:
+            return
+            
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.see(tk.END)
     
     def load_models(self):
-        models = [
-            "openai/gpt-3.5-turbo",
-            "meta-llama/llama-2-70b-chat",
-            "anthropic/claude-3-haiku",
-            "mistralai/mistral-7b-instruct",
-            "google/gemma-7b-it"
-        ]
+        self.catalog.load()
+        models = self.catalog.free or DEFAULT_MODELS
         
         self.white_model_combo['values'] = models
         self.black_model_combo['values'] = models
@@ -150,6 +384,21 @@ class ChessArenaApp:
         if models:
             self.white_model_var.set(models[0])
             self.black_model_var.set(models[1] if len(models) > 1 else models[0])
+            
+        self.catalog.refresh_in_background(lambda catalog: self.root.after(0, self.update_model_choices))
+        
+    def update_model_choices(self):
+        if self.catalog.free:
+            self.white_model_combo['values'] = self.catalog.free
+            self.black_model_combo['values'] = self.catalog.free
+    
+    def open_dashboard(self):
+        if not self.api_key_var.get():
+            messagebox.showerror("Error", "Please enter your OpenRouter API key")
+            return
+            
+        models = [model for model in (self.white_model_var.get(), self.black_model_var.get()) if model]
+        SpectatorDashboard(self.root, build_client(self.api_key_var.get()), models)
     
     def update_speed(self, event=None):
         self.move_delay = float(self.speed_var.get())
@@ -171,14 +420,15 @@ class ChessArenaApp:
         try:
             success, message = self.client.test_connection()
             if success:
-                self.root.after(0, lambda: self.log_message("✅ API connection successful!"))
+                self.log_message("✅ API connection successful!")
                 self.root.after(0, lambda: messagebox.showinfo("Success", "API connection works!"))
             else:
-                self.root.after(0, lambda: self.log_message(f"❌ API connection failed: {message}"))
+                self.log_message(f"❌ API connection failed: {message}")
                 self.root.after(0, lambda: messagebox.showerror("Error", f"API connection failed:\n{message}"))
         except Exception as e:
-            self.root.after(0, lambda: self.log_message(f"❌ API test error: {str(e)}"))
-            self.root.after(0, lambda: messagebox.showerror("Error", f"API test failed:\n{str(e)}"))
+            error = str(e)
+            self.log_message(f"❌ API test error: {error}")
+            self.root.after(0, lambda: messagebox.showerror("Error", f"API test failed:\n{error}"))
     
     def load_config(self):
         try:
@@ -207,8 +457,10 @@ class ChessArenaApp:
         messagebox.showinfo("Success", "Configuration saved!")
         
     def log_message(self, message):
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
+        self.pending_log.append(message)
+        
+    def set_status(self, status):
+        self.pending_status = status
         
     def start_game(self):
         if not self.api_key_var.get():
@@ -220,7 +472,7 @@ class ChessArenaApp:
             return
         
         self.game_running = True
-        self.status_var.set("Game in progress...")
+        self.set_status("Game in progress...")
         self.log_message("=== Game Started ===")
         self.log_message(f"White: {self.white_model_var.get()}")
         self.log_message(f"Black: {self.black_model_var.get()}")
@@ -231,15 +483,16 @@ class ChessArenaApp:
         
     def stop_game(self):
         self.game_running = False
-        self.status_var.set("Game stopped")
+        self.set_status("Game stopped")
         self.log_message("=== Game Stopped ===")
         
     def reset_board(self):
         self.stop_game()
         self.game.reset()
+        self.pending_board = None
         self.setup_chess_board()
         self.log_message("=== Board Reset ===")
-        self.status_var.set("Ready")
+        self.set_status("Ready")
         
     def game_loop(self):
         move_count = 0
@@ -249,32 +502,33 @@ class ChessArenaApp:
                 current_player = "White" if self.game.current_turn == 'white' else "Black"
                 model = self.white_model_var.get() if self.game.current_turn == 'white' else self.black_model_var.get()
                 
-                self.root.after(0, lambda: self.status_var.set(f"{current_player} ({model}) is thinking..."))
+                self.set_status(f"{current_player} ({model}) is thinking...")
                 
                 board_state = self.game.get_fen()
                 valid_moves = self.game.get_legal_moves()
                 
-                move = self.client.get_move(model, board_state, valid_moves, self.game.current_turn)
+                move = self.scheduler.get_move(model, board_state, valid_moves, self.game.current_turn,
+                                               self.game.get_movetext())
                 
                 if move and self.game.make_move(move):
                     move_count += 1
-                    self.root.after(0, self.draw_pieces)
-                    self.root.after(0, lambda: self.log_message(f"{move_count}. {current_player}: {move}"))
+                    self.pending_board = self.game.get_board()
+                    self.log_message(f"{move_count}. {current_player}: {move}")
                     
                     if self.game.is_check():
-                        self.root.after(0, lambda: self.log_message("Check!"))
+                        self.log_message("Check!")
                         
                     if self.game.is_game_over():
                         result = self.game.get_game_result()
-                        self.root.after(0, lambda: self.log_message(f"Game Over: {result}"))
-                        self.root.after(0, lambda: self.status_var.set(f"Game Over: {result}"))
+                        self.log_message(f"Game Over: {result}")
+                        self.set_status(f"Game Over: {result}")
                         self.root.after(0, lambda: self.show_game_result(result))
                         break
                         
                     time.sleep(self.move_delay)
                         
                 else:
-                    self.root.after(0, lambda move=move: self.log_message(f"{current_player} failed to make valid move: {move}"))
+                    self.log_message(f"{current_player} failed to make valid move: {move}")
                     
                     
                     if valid_moves:
@@ -282,18 +536,18 @@ class ChessArenaApp:
                         fallback_move = random.choice(valid_moves)
                         if self.game.make_move(fallback_move):
                             move_count += 1
-                            self.root.after(0, self.draw_pieces)
-                            self.root.after(0, lambda: self.log_message(f"{move_count}. {current_player}: {fallback_move} (fallback)"))
+                            self.pending_board = self.game.get_board()
+                            self.log_message(f"{move_count}. {current_player}: {fallback_move} (fallback)")
                             time.sleep(self.move_delay)
                         else:
-                            self.root.after(0, lambda: self.log_message(f"Game stopped - no valid moves available"))
+                            self.log_message(f"Game stopped - no valid moves available")
                             break
                     else:
-                        self.root.after(0, lambda: self.log_message(f"Game stopped - no legal moves available"))
+                        self.log_message(f"Game stopped - no legal moves available")
                         break
                     
             except Exception as e:
-                self.root.after(0, lambda: self.log_message(f"Error: {str(e)}"))
+                self.log_message(f"Error: {str(e)}")
                 break
                 
         self.game_running = False
@@ -301,6 +555,33 @@ class ChessArenaApp:
     def run(self):
         self.root.mainloop()
 
+def run_dashboard(args):
+    api_key = args.api_key or load_api_key()
+    if not api_key:
+        raise SystemExit("OpenRouter API key not set")
+        
+    root = tk.Tk()
+    root.withdraw()
+    dashboard = SpectatorDashboard(root, build_client(api_key, args.base_url), args.models,
+                                   games_per_pair=args.games_per_pair, concurrency=args.concurrency)
+    dashboard.window.protocol("WM_DELETE_WINDOW", lambda: (dashboard.close(), root.destroy()))
+    if args.models:
+        dashboard.start()
+    root.mainloop()
+
 if __name__ == "__main__":
-    app = ChessArenaApp()
-    app.run()
+    parser = argparse.ArgumentParser(description="AI Chess Arena")
+    parser.add_argument("--dashboard", action="store_true", help="Open the multi-board tournament dashboard only")
+    parser.add_argument("models", nargs="*", help="Models for the dashboard tournament")
+    parser.add_argument("--games-per-pair", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8, help="Games played (and shown) at once")
+    parser.add_argument("--base-url", default="https://openrouter.ai")
+    parser.add_argument("--api-key", default=None)
+    args = parser.parse_args()
+    
+    configure_logging(os.environ.get("ARENA_LOG_LEVEL", "WARNING"))
+    if args.dashboard:
+        run_dashboard(args)
+    else:
+        app = ChessArenaApp()
+        app.run()
@@ -0,0 +1,126 @@
+import math
+
+SPRT_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+def elo_to_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    def __init__(self, first, second, elo_margin=50.0, alpha=0.05, beta=0.05):
+        self.first = first
+        self.second = second
+        self.s0 = elo_to_score(-elo_margin)
+        self.s1 = elo_to_score(elo_margin)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.first_whites = 0
+        self.scheduled = 0
+        self.aborted = 0
+        self.decision = None
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def variance(self):
+        # One pseudo win and one pseudo loss keep the variance positive after a run of identical results
+        n = self.games + 2
+        mean = (self.wins + 1 + 0.5 * self.draws) / n
+        return ((self.wins + 1) * (1 - mean) ** 2 + self.draws * (0.5 - mean) ** 2 + (self.losses + 1) * mean ** 2) / n
+
+    def llr(self):
+        if not self.games:
+            return 0.0
+        total = self.wins + 0.5 * self.draws
+        return (self.s1 - self.s0) * (2 * total - self.games * (self.s0 + self.s1)) / (2 * self.variance())
+
+    def standard_error(self, extra=0):
+        return math.sqrt(self.variance() / (self.games + extra + 1))
+
+    def record(self, white, result):
+        self.first_whites += white == self.first
+        first_score = SPRT_SCORES[result] if white == self.first else 1 - SPRT_SCORES[result]
+        if first_score == 1.0:
+            self.wins += 1
+        elif first_score == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+        llr = self.llr()
+        if llr >= self.upper:
+            self.decision = self.first
+        elif llr <= self.lower:
+            self.decision = self.second
+
+    def next_colors(self, first_whites, games):
+        return (self.first, self.second) if 2 * first_whites <= games else (self.second, self.first)
+
+    def summary(self):
+        return {"first": self.first, "second": self.second, "games": self.games, "wins": self.wins,
+                "draws": self.draws, "losses": self.losses, "aborted": self.aborted, "score": self.score(),
+                "llr": self.llr(), "decision": self.decision}
+
+
+class AdaptiveScheduler:
+    def __init__(self, models, elo_margin=50.0, alpha=0.05, beta=0.05, max_games_per_pair=100, batch_size=8):
+        self.max_games_per_pair = max_games_per_pair
+        self.batch_size = batch_size
+        self.tests = {}
+        for i, first in enumerate(models):
+            for second in models[i + 1:]:
+                self.tests[frozenset((first, second))] = SPRT(first, second, elo_margin, alpha, beta)
+
+    def open_tests(self):
+        return [test for test in self.tests.values()
+                if test.decision is None and test.scheduled < self.max_games_per_pair]
+
+    def record(self, white, black, result):
+        test = self.tests.get(frozenset((white, black)))
+        if test is None:
+            return
+        if result not in SPRT_SCORES:
+            # An aborted game tells the test nothing, so its slot is handed back, but only up to the cap so a
+            # pairing that keeps failing still runs out of games
+            test.aborted += 1
+            if test.aborted <= self.max_games_per_pair and test.scheduled > 0:
+                test.scheduled -= 1
+            return
+        test.record(white, result)
+
+    def next_pairings(self):
+        assigned = {}
+        first_whites = {}
+        pairings = []
+        tests = self.open_tests()
+        for _ in range(self.batch_size):
+            candidates = [test for test in tests if test.scheduled + assigned.get(test, 0) < self.max_games_per_pair]
+            if not candidates:
+                break
+            test = max(candidates, key=lambda t: (t.standard_error(assigned.get(t, 0)), -abs(t.llr())))
+            white, black = test.next_colors(test.first_whites + first_whites.get(test, 0),
+                                            test.games + assigned.get(test, 0))
+            pairings.append((white, black))
+            assigned[test] = assigned.get(test, 0) + 1
+            first_whites[test] = first_whites.get(test, 0) + (white == test.first)
+        for test, count in assigned.items():
+            test.scheduled += count
+        return pairings
+
+    def rounds(self):
+        while True:
+            pairings = self.next_pairings()
+            if not pairings:
+                return
+            yield pairings
+
+    def summary(self):
+        return sorted((test.summary() for test in self.tests.values()), key=lambda row: (row["first"], row["second"]))
@@ -0,0 +1,310 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+METRIC_DEFINITIONS = [
+    ("arena_request_seconds", "histogram", "Chat completion request latency per model", LATENCY_BUCKETS),
+    ("arena_request_ttfb_seconds", "histogram", "Time until the response headers arrived per model", LATENCY_BUCKETS),
+    ("arena_requests_total", "counter", "Chat completion responses per model and HTTP status", None),
+    ("arena_tokens_total", "counter", "Tokens per model, kind and source: usage block, or estimated for cut-off streams",
+     None),
+    ("arena_request_tokens", "histogram", "Total tokens per chat completion per model", TOKEN_BUCKETS),
+    ("arena_retries_total", "counter", "Requests retried by the scheduler per model and reason", None),
+    ("arena_error_fallbacks_total", "counter", "Move requests the client gave up on, by reason", None),
+    ("arena_time_to_move_seconds", "histogram", "Time until a streamed completion contained a legal move", LATENCY_BUCKETS),
+    ("arena_stream_chunks_total", "counter", "Content chunks received from streamed completions, by early cutoff", None),
+    ("arena_prompt_tokens", "histogram", "Prompt tokens per request by model and prompt template", TOKEN_BUCKETS),
+    ("arena_prompt_seconds", "histogram", "Move request latency by model and prompt template", LATENCY_BUCKETS),
+    ("arena_prompt_moves_total", "counter", "Model replies by prompt template: legal, illegal or served from the cache", None),
+    ("arena_ply_seconds", "histogram", "Wall time per ply including queueing, retries and parsing", LATENCY_BUCKETS),
+    ("arena_moves_total", "counter", "Moves per model by source: model, unparsed or illegal", None),
+    ("arena_games_total", "counter", "Finished games per result", None),
+    ("arena_adjudications_total", "counter", "Games ended early by the adjudicator per result", None),
+    ("arena_games_per_hour", "gauge", "Finished games per hour since the run started", None),
+    ("arena_elo", "gauge", "Incremental Elo rating per model", None),
+]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    def merge(self, snapshot):
+        for i, count in enumerate(snapshot["counts"]):
+            self.counts[i] += count
+        self.sum += snapshot["sum"]
+        self.count += snapshot["count"]
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self, definitions=METRIC_DEFINITIONS):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.definitions = {name: (kind, help_text, buckets) for name, kind, help_text, buckets in definitions}
+        self.series = {name: {} for name in self.definitions}
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.series[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.definitions[name][2])
+            histogram.observe(value)
+
+    def histogram(self, name, **labels):
+        with self.lock:
+            return self.series[name].get(tuple(sorted(labels.items())))
+
+    def values(self, name):
+        with self.lock:
+            return {key: value for key, value in self.series[name].items()}
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.series = {name: {} for name in self.definitions}
+
+    def snapshot(self):
+        with self.lock:
+            return self.snapshot_series(self.series)
+
+    def drain(self):
+        # Everything recorded since the last drain, for merging into another process's registry
+        with self.lock:
+            series, self.series = self.series, {name: {} for name in self.definitions}
+        return self.snapshot_series(series)
+
+    def snapshot_series(self, all_series):
+        metrics = {}
+        for name, series in all_series.items():
+            kind, help_text, _ = self.definitions[name]
+            metrics[name] = {
+                "type": kind,
+                "help": help_text,
+                "series": [
+                    dict(labels=dict(key), **(value.snapshot() if kind == "histogram" else {"value": value}))
+                    for key, value in series.items()
+                ],
+            }
+        return {"timestamp": time.time(), "uptime": time.time() - self.started, "metrics": metrics}
+
+    def merge(self, snapshot):
+        with self.lock:
+            for name, metric in snapshot["metrics"].items():
+                if name not in self.series:
+                    continue
+                series = self.series[name]
+                for entry in metric["series"]:
+                    key = tuple(sorted(entry["labels"].items()))
+                    if metric["type"] == "histogram":
+                        if key not in series:
+                            series[key] = Histogram(entry["buckets"])
+                        series[key].merge(entry)
+                    elif metric["type"] == "counter":
+                        series[key] = series.get(key, 0) + entry["value"]
+                    else:
+                        series[key] = entry["value"]
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, series in self.series.items():
+                kind, help_text, _ = self.definitions[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float("inf"),), value.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{name}_bucket{format_labels(key, [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(key)} {value.sum}")
+                    lines.append(f"{name}_count{format_labels(key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def summarize(registry=metrics):
+    models = {}
+
+    def row(model):
+        return models.setdefault(model, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                                         "moves": 0, "unparsed": 0, "illegal": 0, "error_fallbacks": 0})
+
+    for key, count in registry.values("arena_requests_total").items():
+        row(dict(key)["model"])["requests"] += count
+    for key, count in registry.values("arena_tokens_total").items():
+        labels = dict(key)
+        row(labels["model"])[f"{labels['kind']}_tokens"] += count
+    for key, count in registry.values("arena_moves_total").items():
+        labels = dict(key)
+        summary = row(labels["model"])
+        summary["moves"] += count
+        if labels["source"] != "model":
+            summary[labels["source"]] += count
+    for key, count in registry.values("arena_error_fallbacks_total").items():
+        row(dict(key)["model"])["error_fallbacks"] += count
+
+    for model, summary in models.items():
+        for name, prefix in (("arena_request_seconds", "latency"), ("arena_request_ttfb_seconds", "ttfb"),
+                             ("arena_time_to_move_seconds", "ttm"), ("arena_ply_seconds", "ply")):
+            histogram = registry.histogram(name, model=model)
+            summary[f"{prefix}_p50"] = histogram.quantile(0.5) if histogram else None
+            summary[f"{prefix}_p95"] = histogram.quantile(0.95) if histogram else None
+        fallbacks = summary["unparsed"] + summary["illegal"]
+        summary["fallback_rate"] = fallbacks / summary["moves"] if summary["moves"] else 0.0
+    return models
+
+
+def summarize_prompts(registry=metrics):
+    rows = {}
+
+    def row_for(labels):
+        key = labels["model"], labels["template"]
+        if key not in rows:
+            rows[key] = {"model": labels["model"], "template": labels["template"], "requests": 0,
+                         "prompt_tokens": 0.0, "legal": 0, "illegal": 0, "cached": 0}
+        return rows[key]
+
+    for key, histogram in registry.values("arena_prompt_tokens").items():
+        row = row_for(dict(key))
+        row["requests"] = histogram.count
+        row["prompt_tokens"] = histogram.sum / histogram.count if histogram.count else 0.0
+    for key, count in registry.values("arena_prompt_moves_total").items():
+        labels = dict(key)
+        row_for(labels)[labels["outcome"]] += count
+    for (model, template), row in rows.items():
+        histogram = registry.histogram("arena_prompt_seconds", model=model, template=template)
+        row["latency_p50"] = histogram.quantile(0.5) if histogram else None
+        replies = row["legal"] + row["illegal"]
+        row["illegal_rate"] = row["illegal"] / replies if replies else 0.0
+    return sorted(rows.values(), key=lambda row: (row["model"], row["template"]))
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/metrics":
+            body, content_type = self.server.registry.render_prometheus(), "text/plain; version=0.0.4"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(self.server.registry.snapshot()), "application/json"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=9464, registry=metrics):
+        super().__init__((host, port), MetricsRequestHandler)
+        self.registry = registry
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class MetricsSnapshotWriter:
+    def __init__(self, path, interval=10.0, registry=metrics):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def write(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temporary, self.path)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.write()
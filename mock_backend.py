@@ -0,0 +1,154 @@
+import asyncio
+import json
+import random
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+
+from stub_server import STUB_MODELS, pick_batch, pick_move
+
+VERBOSE_TEMPLATES = [
+    "Let me think about this position. The best move here is {move} because it improves my position.",
+    "**Move:** `{move}`",
+    '{{"move": "{move}", "reason": "development"}}',
+    "I'll play {move}.",
+]
+
+
+class LatencyDistribution:
+    def __init__(self, kind="fixed", params=(0.0,)):
+        self.kind = kind
+        self.params = tuple(params)
+
+    @classmethod
+    def parse(cls, spec):
+        kind, _, values = str(spec).partition(":")
+        if not values:
+            kind, values = "fixed", kind
+        params = tuple(float(v) for v in values.split(","))
+        if kind not in ("fixed", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        return cls(kind, params)
+
+    def sample(self, rng):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] else 0.0
+        return rng.lognormvariate(*self.params)
+
+    def __repr__(self):
+        return f"{self.kind}:{','.join(str(p) for p in self.params)}"
+
+
+class MockBackend:
+    def __init__(self, latency="fixed:0", error_rate=0.0, rate_limit_rate=0.0, malformed_rate=0.0,
+                 verbose_rate=0.0, illegal_rate=0.0, seed=0):
+        self.latency = latency if isinstance(latency, LatencyDistribution) else LatencyDistribution.parse(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.verbose_rate = verbose_rate
+        self.illegal_rate = illegal_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "errors": 0, "rate_limited": 0, "malformed": 0, "verbose": 0, "illegal": 0}
+
+    def respond(self, method, path, body):
+        path = path.split("?", 1)[0].rstrip("/")
+        if method == "GET" and path.endswith("/api/v1/models"):
+            return 0.0, 200, {}, json.dumps({"data": STUB_MODELS})
+        if method != "POST" or not path.endswith("/api/v1/chat/completions"):
+            return 0.0, 404, {}, json.dumps({"error": {"message": "Not found"}})
+
+        payload = json.loads(body or b"{}")
+        model = payload.get("model", "")
+        prompt = payload.get("messages", [{}])[-1].get("content", "")
+
+        with self.lock:
+            self.counters["requests"] += 1
+            delay = self.latency.sample(self.rng)
+            roll = self.rng.random()
+            batch = bool(payload.get("response_format"))
+            move = pick_batch(model, prompt, self.rng) if batch else pick_move(model, prompt, self.rng)
+            template = self.rng.choice(VERBOSE_TEMPLATES)
+
+            if roll < self.rate_limit_rate:
+                self.counters["rate_limited"] += 1
+                return delay, 429, {"Retry-After": "0"}, json.dumps({"error": {"code": 429}})
+            roll -= self.rate_limit_rate
+            if roll < self.error_rate:
+                self.counters["errors"] += 1
+                return delay, 500, {}, json.dumps({"error": {"code": 500, "message": "Internal error"}})
+            roll -= self.error_rate
+            if roll < self.malformed_rate:
+                self.counters["malformed"] += 1
+                return delay, 200, {}, '{"choices": [{"message": '
+            roll -= self.malformed_rate
+            if batch:
+                content = move
+            elif roll < self.illegal_rate:
+                self.counters["illegal"] += 1
+                content = "a1a1"
+            elif roll - self.illegal_rate < self.verbose_rate:
+                self.counters["verbose"] += 1
+                content = template.format(move=move)
+            else:
+                content = move
+
+        return delay, 200, {}, json.dumps({
+            "id": f"mock-{self.counters['requests']}",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4 + 1,
+                      "total_tokens": len(prompt) // 4 + len(content) // 4 + 1},
+        })
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+class MockOpenRouterAdapter(BaseAdapter):
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        delay, status, headers, body = self.backend.respond(request.method, request.path_url, request.body)
+        if delay:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update({"Content-Type": "application/json", **headers})
+        response._content = body.encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.reason = "OK" if status == 200 else "Error"
+        return response
+
+    def close(self):
+        pass
+
+
+def install_mock_backend(client, backend=None, **options):
+    backend = backend or MockBackend(**options)
+    client.session.mount(client.base_url, MockOpenRouterAdapter(backend))
+    return backend
+
+
+def mock_transport(backend):
+    async def handler(request):
+        delay, status, headers, body = backend.respond(request.method, request.url.raw_path.decode(), request.content)
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status, headers={"Content-Type": "application/json", **headers}, content=body)
+
+    return httpx.MockTransport(handler)
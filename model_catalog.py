@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from arena_logging import get_logger, log_event
+
+logger = get_logger("catalog")
+
+DEFAULT_CATALOG_PATH = "model_catalog.json"
+
+
+def parse_price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_free(model):
+    pricing = model.get('pricing') or {}
+    return parse_price(pricing.get('prompt', 0)) == 0 and parse_price(pricing.get('completion', 0)) == 0
+
+
+def provider_of(model_id):
+    return model_id.split("/", 1)[0] if "/" in model_id else ""
+
+
+class ModelCatalog:
+    def __init__(self, client, path=DEFAULT_CATALOG_PATH, ttl=3600.0):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self.loaded = False
+        self.reindex([])
+
+    def reindex(self, data):
+        by_id = {}
+        by_provider = {}
+        for model in data:
+            if 'id' not in model:
+                continue
+            by_id[model['id']] = model
+            by_provider.setdefault(provider_of(model['id']), []).append(model['id'])
+        self.data = data
+        self.by_id = by_id
+        self.by_provider = by_provider
+        self.free = sorted(model_id for model_id, model in by_id.items() if is_free(model))
+        self.by_price = sorted(by_id, key=lambda model_id: (self.prompt_price(model_id) is None,
+                                                            self.prompt_price(model_id) or 0.0, model_id))
+        self.by_context = sorted(by_id, key=lambda model_id: (-self.context_length(model_id), model_id))
+
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return True
+            try:
+                with open(self.path, 'r') as f:
+                    cached = json.load(f)
+            except (FileNotFoundError, ValueError):
+                return False
+            self.etag = cached.get('etag')
+            self.last_modified = cached.get('last_modified')
+            self.fetched_at = cached.get('fetched_at', 0.0)
+            self.reindex(cached.get('data', []))
+            self.loaded = True
+            return True
+
+    def save(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({
+                'etag': self.etag,
+                'last_modified': self.last_modified,
+                'fetched_at': self.fetched_at,
+                'data': self.data,
+            }, f)
+        os.replace(temporary, self.path)
+
+    def is_stale(self):
+        return time.time() - self.fetched_at >= self.ttl
+
+    def refresh(self, force=False):
+        self.load()
+        if not force and self.loaded and not self.is_stale():
+            return False
+
+        try:
+            response = self.client.fetch_models(self.etag, self.last_modified)
+        except Exception as e:
+            log_event(logger, logging.WARNING, "catalog_fetch_failed", error=str(e))
+            return False
+
+        with self.lock:
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self.save()
+                log_event(logger, logging.DEBUG, "catalog_not_modified", models=len(self.by_id))
+                return False
+            if response.status_code != 200:
+                log_event(logger, logging.WARNING, "catalog_fetch_failed", status=response.status_code)
+                return False
+
+            self.etag = response.headers.get('ETag')
+            self.last_modified = response.headers.get('Last-Modified')
+            self.fetched_at = time.time()
+            self.reindex(response.json().get('data', []))
+            self.loaded = True
+            self.save()
+            log_event(logger, logging.INFO, "catalog_updated", models=len(self.by_id), free=len(self.free))
+            return True
+
+    def refresh_in_background(self, on_update=None, force=False):
+        def run():
+            if self.refresh(force) and on_update is not None:
+                on_update(self)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, model_id):
+        return self.by_id.get(model_id)
+
+    def __contains__(self, model_id):
+        return model_id in self.by_id
+
+    def prompt_price(self, model_id):
+        return parse_price((self.by_id[model_id].get('pricing') or {}).get('prompt'))
+
+    def context_length(self, model_id):
+        return self.by_id[model_id].get('context_length') or 0
+
+    def providers(self):
+        return sorted(self.by_provider)
+
+    def models(self, provider=None, free=None, max_prompt_price=None, min_context=None):
+        candidates = self.by_provider.get(provider, []) if provider is not None else self.by_id
+        matches = []
+        for model_id in candidates:
+            model = self.by_id[model_id]
+            if free is not None and is_free(model) != free:
+                continue
+            if max_prompt_price is not None:
+                price = self.prompt_price(model_id)
+                if price is None or price > max_prompt_price:
+                    continue
+            if min_context is not None and self.context_length(model_id) < min_context:
+                continue
+            matches.append(model_id)
+        return sorted(matches)
+
+    def unknown(self, model_ids):
+        return [model_id for model_id in model_ids if model_id not in self.by_id]
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+from arena_logging import get_logger, log_event
+
+logger = get_logger("batcher")
+
+
+class PendingBatch:
+    def __init__(self, model):
+        self.model = model
+        self.positions = []
+        self.futures = []
+
+
+class BaseMoveBatcher:
+    def __init__(self, client, window=0.05, max_batch_size=8):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.client = client
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.pending = {}
+        self.counters = {"moves": 0, "batches": 0, "batch_requests": 0, "batched_moves": 0,
+                         "resolved": 0, "unresolved": 0, "failed_batches": 0}
+
+    def enqueue(self, model, position, future):
+        batch = self.pending.get(model)
+        opened = batch is None
+        if opened:
+            batch = self.pending[model] = PendingBatch(model)
+        batch.positions.append(position)
+        batch.futures.append(future)
+        self.counters["moves"] += 1
+
+        full = len(batch.positions) >= self.max_batch_size
+        if full:
+            del self.pending[model]
+        return batch, opened, full
+
+    def take(self, batch):
+        if self.pending.get(batch.model) is batch:
+            del self.pending[batch.model]
+            return True
+        return False
+
+    def wants_request(self, batch):
+        return len(batch.positions) > 1
+
+    def record_batch(self, batch, moves, failed=False):
+        resolved = sum(move is not None for move in moves)
+        self.counters["batches"] += 1
+        if self.wants_request(batch):
+            self.counters["batch_requests"] += 1
+            self.counters["batched_moves"] += len(moves)
+            self.counters["resolved"] += resolved
+            self.counters["unresolved"] += len(moves) - resolved
+            self.counters["failed_batches"] += failed
+        log_event(logger, logging.DEBUG, "batch_dispatched", model=batch.model, size=len(moves),
+                  resolved=resolved, failed=failed)
+
+    def batch_stats(self):
+        stats = dict(self.counters, window=self.window, max_batch_size=self.max_batch_size)
+        stats["mean_batch_size"] = self.counters["moves"] / self.counters["batches"] if self.counters["batches"] else 0.0
+        return stats
+
+    def stats(self):
+        return self.client.stats() if hasattr(self.client, "stats") else {}
+
+
+class MoveBatcher(BaseMoveBatcher):
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self.lock = threading.Lock()
+
+    @property
+    def session(self):
+        return self.client.session
+
+    def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        move = self.client.cached_move(model, board_fen, legal_moves, current_player, history, batch=True)
+        if move is not None:
+            return move
+
+        future = Future()
+        with self.lock:
+            batch, opened, full = self.enqueue(model, (board_fen, legal_moves, current_player), future)
+        if full:
+            self.dispatch(batch)
+        elif opened:
+            timer = threading.Timer(self.window, self.flush, (batch,))
+            timer.daemon = True
+            timer.start()
+
+        move = future.result()
+        if move is None:
+            move = self.client.get_move(model, board_fen, legal_moves, current_player, history)
+        return move
+
+    def flush(self, batch):
+        with self.lock:
+            if not self.take(batch):
+                return
+        self.dispatch(batch)
+
+    def dispatch(self, batch):
+        moves = [None] * len(batch.positions)
+        if self.wants_request(batch):
+            try:
+                moves = self.client.get_moves(batch.model, batch.positions)
+            except Exception as e:
+                # The scheduler already retried the batch; fail each game as a single request would
+                log_event(logger, logging.WARNING, "batch_failed", model=batch.model, size=len(moves), error=str(e))
+                with self.lock:
+                    self.record_batch(batch, moves, failed=True)
+                for future in batch.futures:
+                    future.set_exception(e)
+                return
+
+        with self.lock:
+            self.record_batch(batch, moves)
+        for future, move in zip(batch.futures, moves):
+            future.set_result(move)
+
+
+class AsyncMoveBatcher(BaseMoveBatcher):
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self.tasks = set()
+
+    async def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        move = self.client.cached_move(model, board_fen, legal_moves, current_player, history, batch=True)
+        if move is not None:
+            return move
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch, opened, full = self.enqueue(model, (board_fen, legal_moves, current_player), future)
+        if full:
+            await self.dispatch(batch)
+        elif opened:
+            loop.call_later(self.window, self.flush, batch)
+
+        move = await future
+        if move is None:
+            move = await self.client.get_move(model, board_fen, legal_moves, current_player, history)
+        return move
+
+    def flush(self, batch):
+        if self.take(batch):
+            task = asyncio.ensure_future(self.dispatch(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def dispatch(self, batch):
+        moves = [None] * len(batch.positions)
+        if self.wants_request(batch):
+            try:
+                moves = await self.client.get_moves(batch.model, batch.positions)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "batch_failed", model=batch.model, size=len(moves), error=str(e))
+                self.record_batch(batch, moves, failed=True)
+                for future in batch.futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        self.record_batch(batch, moves)
+        for future, move in zip(batch.futures, moves):
+            if not future.done():
+                future.set_result(move)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from arena_logging import get_logger, log_event
+
+logger = get_logger("cache")
+
+
+def normalize_fen(board_fen):
+    return " ".join(board_fen.split()[:4])
+
+
+class MoveCache:
+    def __init__(self, path=None, memory_size=10000, max_disk_bytes=256 * 1024 * 1024, busy_timeout=30.0):
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0,
+                         "disk_errors": 0}
+
+        self.db = None
+        self.disk_bytes = 0
+        if path:
+            # Worker processes share the file, so wait for another writer's lock instead of failing at once
+            self.db = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self.db.commit()
+            self.disk_bytes = self.stored_bytes()
+
+    def key(self, model, board_fen, payload, prompt_version, variant=None):
+        sampling = {k: v for k, v in payload.items() if k not in ("model", "messages")}
+        material = json.dumps([model, normalize_fen(board_fen), prompt_version, sampling, variant], sort_keys=True)
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return self.memory[key]
+
+            if self.db is not None:
+                try:
+                    row = self.db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                    if row is not None:
+                        self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                        self.db.commit()
+                except sqlite3.OperationalError as e:
+                    self.db_error("get", e)
+                    row = None
+                if row is not None:
+                    self.counters["disk_hits"] += 1
+                    self.remember(key, row[0])
+                    return row[0]
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, response_text):
+        with self.lock:
+            self.remember(key, response_text)
+            self.counters["stores"] += 1
+
+            if self.db is not None:
+                size = len(key) + len(response_text.encode("utf-8"))
+                try:
+                    previous = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                        (key, response_text, size, time.time()),
+                    )
+                    self.disk_bytes += size - (previous[0] if previous else 0)
+                    if self.disk_bytes > self.max_disk_bytes:
+                        # Other processes write to the same file, so recount before evicting
+                        self.disk_bytes = self.stored_bytes()
+                        if self.disk_bytes > self.max_disk_bytes:
+                            self.evict()
+                    self.db.commit()
+                except sqlite3.OperationalError as e:
+                    self.db.rollback()
+                    self.db_error("put", e)
+
+    def stored_bytes(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def db_error(self, operation, error):
+        self.counters["disk_errors"] += 1
+        log_event(logger, logging.WARNING, "cache_db_error", operation=operation, error=str(error))
+
+    def remember(self, key, response_text):
+        self.memory[key] = response_text
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def evict(self):
+        target = self.max_disk_bytes * 0.9
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY last_used")
+        evicted = []
+        for key, size in rows:
+            if self.disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self.disk_bytes -= size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.counters["evictions"] += len(evicted)
+
+    def stats(self):
+        with self.lock:
+            if self.db is not None:
+                try:
+                    self.disk_bytes = self.stored_bytes()
+                except sqlite3.OperationalError as e:
+                    self.db_error("stats", e)
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            return dict(
+                self.counters,
+                hit_rate=hits / lookups if lookups else 0.0,
+                memory_entries=len(self.memory),
+                disk_bytes=self.disk_bytes,
+            )
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,180 @@
+import re
+from collections import namedtuple
+
+ParseResult = namedtuple("ParseResult", "move confidence notation marked", defaults=(False,))
+
+EXACT = "exact"
+HIGH = "high"
+LOW = "low"
+NONE = "none"
+
+NO_MOVE = ParseResult(None, NONE, None)
+
+MOVE_TOKEN = re.compile(
+    r"""
+    (?P<marker>\bmove\b["'*`]*\s*[:=]\s*["'*`]*)
+  | (?P<lan>(?<![\w-])(?:[KQRBN][a-h][1-8][-x]|[a-h][1-8]x)[a-h][1-8](?:=?[QRBNqrbn])?[+#]?(?![a-z0-9]))
+  | (?P<uci>\b[a-h][1-8]-?[a-h][1-8](?:=?[qrbnQRBN])?(?![a-z0-9]))
+  | (?P<castle>(?<![\w-])[O0o]-[O0o](?:-[O0o])?(?![\w-]))
+  | (?P<san>(?<![\w-])[KQRBNkqrn]?[a-h]?[1-8]?x?[a-h][1-8](?:=?[QRBNqrbn])?[+#]?(?![a-z0-9]))
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+DECORATION = " \t\r\n.!,;:\"'`*_()[]{}"
+
+TOKEN_END = re.compile(r"[\s.,;:!?)\]}\"'`*]")
+
+
+SAN_PARTS = re.compile(r"([KQRBN]?)([a-h]?)([1-8]?)x?([a-h][1-8])=?([qrbn]?)", re.IGNORECASE)
+
+LAN_PARTS = re.compile(r"([KQRBN]?)([a-h][1-8])[-x]([a-h][1-8])=?([qrbn]?)", re.IGNORECASE)
+
+# "Knight to f3": a piece named just before a bare square decides which piece moves there
+PIECE_WORD = re.compile(
+    r"\b(king|queen|rook|bishop|knight|pawn)s?\W*(?:(?:to|on|from|takes|captures|moves|goes|[a-h][1-8])\W+)*$",
+    re.IGNORECASE,
+)
+
+PIECE_LETTERS = {"king": "K", "queen": "Q", "rook": "R", "bishop": "B", "knight": "N", "pawn": "P"}
+
+
+def piece_at(ranks, square):
+    file_index = ord(square[0]) - 97
+    for symbol in ranks[8 - int(square[1])]:
+        if symbol.isdigit():
+            file_index -= int(symbol)
+            if file_index < 0:
+                return None
+        elif file_index == 0:
+            return symbol
+        else:
+            file_index -= 1
+    return None
+
+
+class MoveParser:
+    def resolve(self, kind, token, legal, board_fen, piece_hint=None):
+        uci = None
+        if kind == "uci":
+            uci = token.lower().replace("-", "").replace("=", "")
+            if uci in legal and token[0] not in "KQRBN":
+                return uci
+
+        if kind == "lan":
+            piece, from_square, to_square, promotion = LAN_PARTS.fullmatch(token.rstrip("+#")).groups()
+            uci = (from_square + to_square + promotion).lower()
+            if uci not in legal:
+                return None
+            if board_fen is None or not piece:
+                return uci
+            placement, turn = board_fen.split(" ", 2)[:2]
+            symbol = piece.upper() if turn == "w" else piece.lower()
+            return uci if piece_at(placement.split("/"), uci) == symbol else None
+
+        if board_fen is None:
+            return uci if uci in legal else None
+        placement, turn = board_fen.split(" ", 2)[:2]
+        ranks = placement.split("/")
+        king = "K" if turn == "w" else "k"
+
+        if kind == "castle":
+            target = "c" if len(token) > 3 else "g"
+            for candidate in legal:
+                if candidate[2] == target and candidate[0] == "e" and piece_at(ranks, candidate) == king:
+                    return candidate
+            return None
+
+        parts = SAN_PARTS.fullmatch(token.rstrip("+#"))
+        if parts is None:
+            return uci if uci in legal else None
+        piece, from_file, from_rank, target, promotion = parts.groups()
+        if piece == "b":
+            piece, from_file = "", "b"
+        piece = (piece or piece_hint or "P").upper()
+        symbol = piece if turn == "w" else piece.lower()
+        from_file, target, promotion = from_file.lower(), target.lower(), promotion.lower()
+
+        found = None
+        for candidate in legal:
+            if candidate[2:4] != target or candidate[4:] != promotion or piece_at(ranks, candidate) != symbol:
+                continue
+            if (from_file and candidate[0] != from_file) or (from_rank and candidate[1] != from_rank):
+                continue
+            if found is not None:
+                return None
+            found = candidate
+        if found is None and uci in legal:
+            return uci
+        return found
+
+    def parse(self, response_text, legal_moves, board_fen=None):
+        if not response_text:
+            return NO_MOVE
+        legal = legal_moves if isinstance(legal_moves, (set, frozenset, dict)) else set(legal_moves)
+
+        stripped = response_text.strip(DECORATION)
+        if stripped in legal:
+            return ParseResult(stripped, EXACT, "uci")
+
+        candidates = []
+        after_marker = False
+        marked = None
+        for match in MOVE_TOKEN.finditer(response_text):
+            kind = match.lastgroup
+            if kind == "marker":
+                after_marker = True
+                continue
+            token = match.group(kind)
+            piece_hint = None
+            if kind == "san" and token[0] not in "KQRBN":
+                word = PIECE_WORD.search(response_text, max(0, match.start() - 40), match.start())
+                piece_hint = PIECE_LETTERS[word.group(1).lower()] if word else None
+            uci = self.resolve(kind, token, legal, board_fen, piece_hint)
+            if uci is None:
+                after_marker = False
+                continue
+            if after_marker and marked is None:
+                marked = (uci, kind)
+            after_marker = False
+            candidates.append((uci, kind, match))
+
+        if not candidates:
+            return NO_MOVE
+
+        distinct = {uci for uci, _, _ in candidates}
+        if marked is not None:
+            move, kind = marked
+            return ParseResult(move, HIGH, kind, True)
+
+        move, kind, match = candidates[0]
+        if len(candidates) == 1 and stripped == match.group(kind).strip(DECORATION):
+            return ParseResult(move, EXACT, kind)
+        if len(distinct) == 1:
+            return ParseResult(move, HIGH, kind)
+        return ParseResult(move, LOW, kind)
+
+
+default_parser = MoveParser()
+
+
+class StreamingMoveParser:
+    def __init__(self, legal_moves, board_fen=None, parser=default_parser):
+        self.legal = set(legal_moves)
+        self.board_fen = board_fen
+        self.parser = parser
+        self.text = ""
+        self.parsed_up_to = 0
+
+    def feed(self, delta):
+        self.text += delta
+        ends = [match.start() for match in TOKEN_END.finditer(self.text, self.parsed_up_to)]
+        if not ends:
+            return None
+        self.parsed_up_to = ends[-1] + 1
+        parsed = self.parser.parse(self.text[:ends[-1]], self.legal, self.board_fen)
+        # A move merely mentioned so far may still be overridden by a later "Move: ..." answer
+        return parsed.move if parsed.confidence == EXACT or parsed.marked else None
+
+    def finish(self):
+        return self.parser.parse(self.text, self.legal, self.board_fen)
@@ -0,0 +1,130 @@
+import mmap
+import os
+import random
+import threading
+from array import array
+from collections import namedtuple
+
+import chess
+import chess.polyglot
+
+Opening = namedtuple("Opening", "fen moves name")
+
+
+def parse_epd_line(line):
+    fields = line.split()
+    if len(fields) < 4:
+        return None
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        board = chess.Board(" ".join(fields[:6]))
+        return board.fen(), " ".join(fields[6:]).strip(";") or None
+    board, operations = chess.Board.from_epd(line)
+    name = operations.get("id") or operations.get("c0")
+    return board.fen(), str(name) if name is not None else None
+
+
+class EpdPositions:
+    def __init__(self, path, shuffle=False, seed=None):
+        self.path = path
+        self.shuffle = shuffle
+        self.random = random.Random(seed)
+        self.size = os.path.getsize(path)
+        if not self.size:
+            raise ValueError(f"Opening file {path} is empty")
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if shuffle else None
+        self.lines = None
+        self.line_starts = None
+
+    def sequential_lines(self):
+        while True:
+            self.file.seek(0)
+            for line in self.file:
+                yield line
+
+    def index_lines(self):
+        starts = array("Q", [0])
+        offset = self.data.find(b"\n")
+        while 0 <= offset < self.size - 1:
+            starts.append(offset + 1)
+            offset = self.data.find(b"\n", offset + 1)
+        return starts
+
+    def random_line(self):
+        # Pick from an index of line starts so long lines are no likelier than short ones
+        if self.line_starts is None:
+            self.line_starts = self.index_lines()
+        start = self.line_starts[self.random.randrange(len(self.line_starts))]
+        end = self.data.find(b"\n", start)
+        return self.data[start:end if end >= 0 else self.size]
+
+    def next_line(self):
+        if self.shuffle:
+            return self.random_line()
+        if self.lines is None:
+            self.lines = self.sequential_lines()
+        return next(self.lines)
+
+    def next_position(self):
+        for _ in range(1000):
+            line = self.next_line().decode("utf-8", "replace").strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                position = parse_epd_line(line)
+            except ValueError:
+                continue
+            if position is not None:
+                return position
+        raise ValueError(f"No valid positions found in {self.path}")
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+
+class OpeningBook:
+    def __init__(self, epd_path=None, polyglot_path=None, book_plies=8, shuffle=False, seed=None):
+        self.epd_path = epd_path
+        self.polyglot_path = polyglot_path
+        self.book_plies = book_plies if polyglot_path else 0
+        self.shuffle = shuffle
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.positions = EpdPositions(epd_path, shuffle, seed) if epd_path else None
+        self.reader = chess.polyglot.open_reader(polyglot_path) if polyglot_path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def settings(self):
+        return {"epd": self.epd_path, "polyglot": self.polyglot_path, "book_plies": self.book_plies,
+                "shuffle": self.shuffle, "seed": self.seed}
+
+    def book_moves(self, board):
+        moves = []
+        for _ in range(self.book_plies):
+            try:
+                entry = self.reader.weighted_choice(board, random=self.random)
+            except IndexError:
+                break
+            moves.append(entry.move.uci())
+            board.push(entry.move)
+        return moves
+
+    def next_opening(self):
+        with self.lock:
+            fen, name = self.positions.next_position() if self.positions else (None, None)
+            moves = self.book_moves(chess.Board(fen) if fen else chess.Board()) if self.reader else []
+            return Opening(fen, moves, name)
+
+    def close(self):
+        if self.positions is not None:
+            self.positions.close()
+        if self.reader is not None:
+            self.reader.close()
@@ -1,132 +1,284 @@
 import requests
 import json
+import logging
 import re
 import time
+from email.utils import parsedate_to_datetime
 
-class OpenRouterClient:
-    def __init__(self, api_key=None):
+from arena_logging import get_logger, log_event, should_dump_payload
+from metrics import metrics
+from model_catalog import is_free
+from move_parser import StreamingMoveParser, default_parser
+from prompts import default_profiles, estimate_tokens
+
+logger = get_logger("client")
+
+API_ERROR_HINTS = {
+    401: "Unauthorized. Please check your API key.",
+    403: "Forbidden. Your API key may not have access to this model.",
+    404: "API endpoint not found. Please check your OpenRouter API key and model name.",
+}
+
+PROMPT_VERSION = 2
+
+BATCH_SYSTEM_PROMPT = "You are a chess engine playing several games at once. For every numbered position pick ONE valid move in UCI notation. Respond with ONLY a JSON object mapping each position number to its move, for example {\"1\": \"e2e4\", \"2\": \"g8f6\"}."
+
+BATCH_ANSWER_LINE = re.compile(r"^\W*(?:position|game)?\s*(\d+)\W*[:=)\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+class RateLimitError(Exception):
+    def __init__(self, model, retry_after=None, response=None):
+        super().__init__(f"Rate limited on {model}" + (f", retry after {retry_after:.1f}s" if retry_after is not None else ""))
+        self.model = model
+        self.retry_after = retry_after
+        self.response = response
+
+class MoveRequestFailed(Exception):
+    def __init__(self, model, reason):
+        super().__init__(f"Move request to {model} failed ({reason})")
+        self.model = model
+        self.reason = reason
+
+def split_batch_answers(text):
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+            if isinstance(data, dict):
+                return {str(key).strip(): str(value) for key, value in data.items()}
+        except ValueError:
+            pass
+    return {number: answer for number, answer in BATCH_ANSWER_LINE.findall(text)}
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class BaseOpenRouterClient:
+    def __init__(self, api_key=None, base_url="https://openrouter.ai", cache=None, stream=False, prompts=None):
         self.api_key = api_key
-        self.base_url = "https://openrouter.ai"
-        self.session = requests.Session()
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.stream = stream
+        self.prompts = prompts or default_profiles
+        self.move_parser = default_parser
         
     def set_api_key(self, api_key):
         self.api_key = api_key
         
-    def get_move(self, model, board_fen, legal_moves, current_player):
-        if not self.api_key:
-            raise ValueError("API key not set")
-            
+    def get_headers(self, move_request=False):
         headers = {
             "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/ai-chess-arena",
-            "X-Title": "AI Chess Arena"
+            "Content-Type": "application/json"
         }
+        if move_request:
+            headers["HTTP-Referer"] = "https://github.com/ai-chess-arena"
+            headers["X-Title"] = "AI Chess Arena"
+        return headers
+        
+    def build_move_payload(self, model, board_fen, legal_moves, current_player, history=None):
+        template = self.prompts.template_for(model, board_fen)
         
-        prompt = self.create_chess_prompt(board_fen, legal_moves, current_player)
+        return {
+            "model": model,
+            "messages": template.messages(board_fen, legal_moves, current_player, history),
+            "max_tokens": 20,
+            "temperature": 0.3,
+            "stop": ["\n", " ", "."]
+        }
         
-        payload = {
+    def build_batch_payload(self, model, positions):
+        return {
             "model": model,
             "messages": [
                 {
                     "role": "system",
-                    "content": "You are a chess engine. You must respond with ONLY a valid chess move in UCI notation. Examples: e2e4, g1f3, d7d5, a7a8q. Respond with exactly 4 or 5 characters, nothing else."
+                    "content": BATCH_SYSTEM_PROMPT
                 },
                 {
-                    "role": "user", 
-                    "content": prompt
+                    "role": "user",
+                    "content": self.create_batch_prompt(positions)
                 }
             ],
-            "max_tokens": 20,
+            "max_tokens": 20 * len(positions) + 20,
             "temperature": 0.3,
-            "stop": ["\n", " ", "."]
+            "response_format": {"type": "json_object"}
         }
         
-        try:
-            response = self.session.post(
-                f"{self.base_url}/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            print(f"API Response Status: {response.status_code}")
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            print(f"API Response: {result}")
-            
-            if 'choices' in result and len(result['choices']) > 0:
-                move_text = result['choices'][0]['message']['content'].strip()
-                print(f"AI Response Text: '{move_text}'")
-                move = self.extract_move_from_response(move_text, legal_moves)
-                print(f"Parsed Move: {move}")
-                return move
-            else:
-                print(f"No choices in response: {result}")
-                return None
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Full API Error: {e}")
-            print(f"Response status: {getattr(response, 'status_code', 'No response')}")
-            print(f"Response text: {getattr(response, 'text', 'No response text')}")
-            if "404" in str(e):
-                print(f"API endpoint not found. Please check your OpenRouter API key and model name.")
-            elif "401" in str(e):
-                print(f"Unauthorized. Please check your API key.")
-            elif "403" in str(e):
-                print(f"Forbidden. Your API key may not have access to this model.")
-            else:
-                print(f"API request failed: {e}")
-            return self.get_random_legal_move(legal_moves)
-        except Exception as e:
-            print(f"Error parsing response: {e}")
-            return self.get_random_legal_move(legal_moves)
-            
-    def create_chess_prompt(self, board_fen, legal_moves, current_player):
-        prompt = f"""Position: {board_fen}
+    def create_batch_prompt(self, positions):
+        sections = []
+        for number, (board_fen, legal_moves, current_player) in enumerate(positions, 1):
+            sections.append(f"""Position {number}: {board_fen}
 Player: {current_player}
-
-Valid moves: {', '.join(legal_moves[:15])}
-
-Pick ONE move from the valid moves list above. Reply with exactly 4-5 characters only:"""
+Valid moves: {' '.join(legal_moves)}""")
+        
+        return "\n\n".join(sections) + f"\n\nPick ONE move from the valid moves of each of the {len(positions)} positions above. Reply with the JSON object only:"
+        
+    def cache_key(self, model, board_fen, payload, history=None):
+        if self.cache is None:
+            return None
+        # The messages are left out of the key, so name the prompt they were rendered from instead
+        template = self.prompts.template_for(model, board_fen)
+        variant = [template.name, history if template.uses_history else None]
+        return self.cache.key(model, board_fen, payload, PROMPT_VERSION, variant)
+        
+    def batch_cache_key(self, model, board_fen, payload):
+        if self.cache is None:
+            return None
+        return self.cache.key(model, board_fen, payload, PROMPT_VERSION, ["batch"])
         
-        return prompt
+    def lookup_cache(self, cache_key, legal_moves, board_fen=None):
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        return self.extract_move_from_response(cached, legal_moves, board_fen)
         
-    def extract_move_from_response(self, response_text, legal_moves):
-        print(f"Extracting move from: '{response_text}'")
-        print(f"Available legal moves: {legal_moves[:10]}...")  # Show first 10 moves
+    def cached_move(self, model, board_fen, legal_moves, current_player, history=None, batch=False):
+        if self.cache is None:
+            return None
+        payload = self.build_move_payload(model, board_fen, legal_moves, current_player, history)
+        move = self.lookup_cache(self.cache_key(model, board_fen, payload, history), legal_moves, board_fen)
+        if move is not None:
+            self.record_cached_prompt(model, board_fen)
+        elif batch:
+            move = self.lookup_cache(self.batch_cache_key(model, board_fen, payload), legal_moves, board_fen)
+        return move
         
-        response_text = response_text.lower().strip()
+    def store_completion(self, cache_key, result, move):
+        if cache_key is not None and move is not None:
+            self.cache.put(cache_key, result['choices'][0]['message']['content'].strip())
         
-        move_patterns = [
-            r'\b([a-h][1-8][a-h][1-8][qrbn]?)\b',
-            r'\b([a-h]\d[a-h]\d[qrbn]?)\b'
+    def parse_completion(self, result, legal_moves, board_fen=None):
+        if 'choices' in result and len(result['choices']) > 0:
+            move_text = result['choices'][0]['message']['content'].strip()
+            parsed = self.parse_move(move_text, legal_moves, board_fen)
+            log_event(logger, logging.DEBUG, "move_parsed", text=move_text, move=parsed.move,
+                      confidence=parsed.confidence, notation=parsed.notation)
+            return parsed.move
+        else:
+            log_event(logger, logging.WARNING, "no_choices", response=result)
+            return None
+        
+    def record_prompt(self, model, board_fen, payload, usage, move, latency):
+        template = self.prompts.template_for(model, board_fen)
+        tokens = (usage or {}).get('prompt_tokens') or template.estimate_tokens(payload['messages'][-1]['content'])
+        metrics.observe("arena_prompt_tokens", tokens, model=model, template=template.name)
+        metrics.observe("arena_prompt_seconds", latency, model=model, template=template.name)
+        metrics.inc("arena_prompt_moves_total", model=model, template=template.name,
+                    outcome="legal" if move is not None else "illegal")
+        
+    def record_cached_prompt(self, model, board_fen):
+        template = self.prompts.template_for(model, board_fen)
+        metrics.inc("arena_prompt_moves_total", model=model, template=template.name, outcome="cached")
+        
+    def parse_stream_line(self, line):
+        if not line or not line.startswith("data:"):
+            return None, None, False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None, None, True
+        chunk = json.loads(data)
+        if chunk.get('error'):
+            raise ValueError(chunk['error'].get('message', 'stream error'))
+        choices = chunk.get('choices') or [{}]
+        return (choices[0].get('delta') or {}).get('content'), chunk.get('usage'), False
+        
+    def finish_stream(self, model, board_fen, payload, parser, cache_key, move, chunks, usage, started, moved_at):
+        finished_at = time.perf_counter()
+        cut_off = move is not None
+        if move is None:
+            parsed = parser.finish()
+            move = parsed.move
+            moved_at = finished_at if move is not None else None
+        if moved_at is not None:
+            metrics.observe("arena_time_to_move_seconds", moved_at - started, model=model)
+        metrics.inc("arena_stream_chunks_total", chunks, model=model, cut_off=str(cut_off).lower())
+        if usage:
+            self.record_usage(model, {'usage': usage})
+        else:
+            # A stream closed at the first move ends before its usage chunk, so count what was sent and received
+            template = self.prompts.template_for(model, board_fen)
+            self.record_usage(model, {'usage': {
+                "prompt_tokens": template.estimate_tokens(payload['messages'][-1]['content']),
+                "completion_tokens": estimate_tokens(parser.text),
+            }}, source="estimated")
+        log_event(logger, logging.DEBUG, "stream_finished", model=model, text=parser.text, move=move, chunks=chunks,
+                  cut_off=cut_off, time_to_move=round(moved_at - started, 4) if moved_at else None)
+        if cache_key is not None and move is not None:
+            self.cache.put(cache_key, parser.text.strip())
+        return move, finished_at - started
+        
+    def parse_batch_completion(self, result, positions):
+        if not result.get('choices'):
+            log_event(logger, logging.WARNING, "no_choices", response=result)
+            return [None] * len(positions), [None] * len(positions)
+        
+        answers = split_batch_answers(result['choices'][0]['message']['content'].strip())
+        moves, texts = [], []
+        for number, (board_fen, legal_moves, _) in enumerate(positions, 1):
+            text = answers.get(str(number))
+            moves.append(self.parse_move(text, legal_moves, board_fen).move if text else None)
+            texts.append(text)
+        log_event(logger, logging.DEBUG, "batch_parsed", positions=len(positions),
+                  resolved=sum(move is not None for move in moves))
+        return moves, texts
+        
+    def batch_cache_keys(self, model, positions):
+        return [
+            self.batch_cache_key(model, board_fen, self.build_move_payload(model, board_fen, legal_moves, current_player))
+            for board_fen, legal_moves, current_player in positions
         ]
         
-        for pattern in move_patterns:
-            matches = re.findall(pattern, response_text)
-            print(f"Pattern {pattern} found: {matches}")
-            for match in matches:
-                if match in legal_moves:
-                    print(f"Valid move found: {match}")
-                    return match
-                    
-        words = response_text.split()
-        for word in words:
-            clean_word = re.sub(r'[^a-h0-9]', '', word)
-            if clean_word in legal_moves:
-                print(f"Valid word move found: {clean_word}")
-                return clean_word
-                
-        for move in legal_moves:
-            if move in response_text:
-                print(f"Direct match found: {move}")
-                return move
+    def store_batch_completion(self, cache_keys, moves, texts):
+        for cache_key, move, text in zip(cache_keys, moves, texts):
+            if cache_key is not None and move is not None:
+                self.cache.put(cache_key, text.strip())
         
-        print(f"No valid move found in response: '{response_text}'")        
-        return None
+    def parse_move(self, response_text, legal_moves, board_fen=None):
+        return self.move_parser.parse(response_text, legal_moves, board_fen)
+        
+    def extract_move_from_response(self, response_text, legal_moves, board_fen=None):
+        parsed = self.parse_move(response_text, legal_moves, board_fen)
+        if parsed.move is None:
+            log_event(logger, logging.DEBUG, "move_not_found", text=response_text, legal_moves=len(legal_moves))
+        return parsed.move
+        
+    def log_api_error(self, model, error, status=None, body=None):
+        log_event(logger, logging.WARNING, "api_error", model=model, status=status,
+                  error=str(error), hint=API_ERROR_HINTS.get(status))
+        if body is not None and should_dump_payload(logger):
+            log_event(logger, logging.DEBUG, "api_error_body", model=model, body=body)
+        
+    def log_response(self, model, status, latency, result=None):
+        log_event(logger, logging.DEBUG, "api_response", model=model, status=status, latency=round(latency, 4))
+        if result is not None and should_dump_payload(logger):
+            log_event(logger, logging.DEBUG, "api_payload", model=model, response=result)
+        
+    def record_request(self, model, status, latency, ttfb=None):
+        metrics.inc("arena_requests_total", model=model, status=status)
+        metrics.observe("arena_request_seconds", latency, model=model)
+        if ttfb is not None:
+            metrics.observe("arena_request_ttfb_seconds", ttfb, model=model)
+        
+    def record_usage(self, model, result, source="usage"):
+        usage = result.get('usage') or {}
+        for kind in ("prompt", "completion"):
+            if usage.get(f"{kind}_tokens"):
+                metrics.inc("arena_tokens_total", usage[f"{kind}_tokens"], model=model, kind=kind, source=source)
+        if usage.get('total_tokens'):
+            metrics.observe("arena_request_tokens", usage['total_tokens'], model=model)
+        
+    def record_error_fallback(self, model, reason, count=1):
+        metrics.inc("arena_error_fallbacks_total", count, model=model, reason=reason)
         
     def get_random_legal_move(self, legal_moves):
         if legal_moves:
@@ -134,14 +286,175 @@ Pick ONE move from the valid moves list above. Reply with exactly 4-5 characters
             return random.choice(legal_moves)
         return None
         
+    def parse_free_models(self, models_data):
+        free_models = []
+        
+        for model in models_data.get('data', []):
+            if is_free(model):
+                free_models.append(model['id'])
+                
+        return free_models
+
+class OpenRouterClient(BaseOpenRouterClient):
+    def __init__(self, api_key=None, base_url="https://openrouter.ai", cache=None, stream=False, prompts=None):
+        super().__init__(api_key, base_url, cache, stream, prompts)
+        self.session = requests.Session()
+        
+    def request_move(self, model, board_fen, legal_moves, current_player, check_cache=True, history=None):
+        if not self.api_key:
+            raise ValueError("API key not set")
+            
+        headers = self.get_headers(move_request=True)
+        payload = self.build_move_payload(model, board_fen, legal_moves, current_player, history)
+        
+        cache_key = self.cache_key(model, board_fen, payload, history)
+        if check_cache:
+            move = self.lookup_cache(cache_key, legal_moves, board_fen)
+            if move is not None:
+                self.record_cached_prompt(model, board_fen)
+                return move
+        
+        if self.stream:
+            return self.stream_move(model, headers, payload, cache_key, legal_moves, board_fen)
+        
+        started = time.perf_counter()
+        response = self.session.post(
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=30
+        )
+        latency = time.perf_counter() - started
+        self.record_request(model, response.status_code, latency, response.elapsed.total_seconds())
+        
+        if response.status_code == 429:
+            raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+            
+        response.raise_for_status()
+        result = response.json()
+        
+        self.log_response(model, response.status_code, latency, result)
+        self.record_usage(model, result)
+        
+        move = self.parse_completion(result, legal_moves, board_fen)
+        self.record_prompt(model, board_fen, payload, result.get('usage'), move, latency)
+        self.store_completion(cache_key, result, move)
+        return move
+        
+    def stream_move(self, model, headers, payload, cache_key, legal_moves, board_fen):
+        parser = StreamingMoveParser(legal_moves, board_fen, self.move_parser)
+        move = moved_at = usage = None
+        chunks = 0
+        
+        started = time.perf_counter()
+        response = self.session.post(
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=headers,
+            json=dict(payload, stream=True),
+            timeout=30,
+            stream=True
+        )
+        try:
+            if response.status_code >= 400:
+                response.content
+                self.record_request(model, response.status_code, time.perf_counter() - started,
+                                    response.elapsed.total_seconds())
+                if response.status_code == 429:
+                    raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+                response.raise_for_status()
+            
+            for line in response.iter_lines(decode_unicode=True):
+                delta, chunk_usage, done = self.parse_stream_line(line)
+                usage = chunk_usage or usage
+                if done:
+                    break
+                if delta:
+                    chunks += 1
+                    move = parser.feed(delta)
+                    if move is not None:
+                        moved_at = time.perf_counter()
+                        break
+        finally:
+            response.close()
+        
+        move, latency = self.finish_stream(model, board_fen, payload, parser, cache_key, move, chunks, usage, started,
+                                           moved_at)
+        self.record_prompt(model, board_fen, payload, usage, move, latency)
+        self.record_request(model, response.status_code, latency, response.elapsed.total_seconds())
+        self.log_response(model, response.status_code, latency)
+        return move
+        
+    def request_moves(self, model, positions):
+        if not self.api_key:
+            raise ValueError("API key not set")
+            
+        payload = self.build_batch_payload(model, positions)
+        
+        started = time.perf_counter()
+        response = self.session.post(
+            f"{self.base_url}/api/v1/chat/completions",
+            headers=self.get_headers(move_request=True),
+            json=payload,
+            timeout=30
+        )
+        latency = time.perf_counter() - started
+        self.record_request(model, response.status_code, latency, response.elapsed.total_seconds())
+        
+        if response.status_code == 429:
+            raise RateLimitError(model, parse_retry_after(response.headers.get("Retry-After")), response)
+            
+        response.raise_for_status()
+        result = response.json()
+        
+        self.log_response(model, response.status_code, latency, result)
+        self.record_usage(model, result)
+        
+        moves, texts = self.parse_batch_completion(result, positions)
+        self.store_batch_completion(self.batch_cache_keys(model, positions), moves, texts)
+        return moves
+        
+    def get_moves(self, model, positions):
+        if not self.api_key:
+            raise ValueError("API key not set")
+            
+        try:
+            return self.request_moves(model, positions)
+            
+        except (requests.exceptions.RequestException, RateLimitError) as e:
+            response = getattr(e, 'response', None)
+            status = getattr(response, 'status_code', None)
+            self.log_api_error(model, e, status, getattr(response, 'text', None))
+            reason = str(status) if status else "connection"
+            self.record_error_fallback(model, reason, len(positions))
+            raise MoveRequestFailed(model, reason) from e
+        except Exception as e:
+            log_event(logger, logging.WARNING, "invalid_response", model=model, error=str(e))
+            return [None] * len(positions)
+        
+    def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        if not self.api_key:
+            raise ValueError("API key not set")
+            
+        try:
+            return self.request_move(model, board_fen, legal_moves, current_player, history=history)
+                
+        except (requests.exceptions.RequestException, RateLimitError) as e:
+            response = getattr(e, 'response', None)
+            status = getattr(response, 'status_code', None)
+            self.log_api_error(model, e, status, getattr(response, 'text', None))
+            reason = str(status) if status else "connection"
+            self.record_error_fallback(model, reason)
+            raise MoveRequestFailed(model, reason) from e
+        except Exception as e:
+            log_event(logger, logging.WARNING, "invalid_response", model=model, error=str(e))
+            self.record_error_fallback(model, "invalid_response")
+            raise MoveRequestFailed(model, "invalid_response") from e
+            
     def test_connection(self):
         if not self.api_key:
             return False, "API key not set"
             
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = self.get_headers()
         
         try:
             response = self.session.get(
@@ -158,14 +471,24 @@ Pick ONE move from the valid moves list above. Reply with exactly 4-5 characters
         except Exception as e:
             return False, f"Connection failed: {str(e)}"
             
+    def fetch_models(self, etag=None, last_modified=None):
+        headers = self.get_headers() if self.api_key else {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+            
+        return self.session.get(
+            f"{self.base_url}/api/v1/models",
+            headers=headers,
+            timeout=10
+        )
+        
     def get_available_models(self):
         if not self.api_key:
             return []
             
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = self.get_headers()
         
         try:
             response = self.session.get(
@@ -175,17 +498,10 @@ Pick ONE move from the valid moves list above. Reply with exactly 4-5 characters
             )
             
             if response.status_code == 200:
-                models_data = response.json()
-                free_models = []
-                
-                for model in models_data.get('data', []):
-                    if model.get('pricing', {}).get('prompt', 0) == 0:
-                        free_models.append(model['id'])
-                        
-                return free_models
+                return self.parse_free_models(response.json())
             else:
                 return []
                 
         except Exception as e:
-            print(f"Error fetching models: {e}")
+            log_event(logger, logging.WARNING, "models_fetch_failed", error=str(e))
             return []
@@ -0,0 +1,236 @@
+import logging
+import math
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from adjudication import build_adjudicator
+from arena_logging import configure_logging, get_logger, log_event
+from metrics import metrics
+from move_cache import MoveCache
+from scheduler import DEFAULT_RATE
+from tournament import TournamentRunner, build_client, play_game
+
+logger = get_logger("workers")
+
+REQUEST_COUNTERS = ("requests", "rate_limited", "errors", "retries", "gave_up", "invalid_responses",
+                    "in_flight", "concurrency_limit")
+BATCH_COUNTERS = ("moves", "batches", "batch_requests", "batched_moves", "resolved", "unresolved", "failed_batches")
+CACHE_COUNTERS = ("memory_hits", "disk_hits", "misses", "stores", "evictions", "disk_errors", "memory_entries")
+
+
+def worker_stats(client, cache):
+    stats = {"worker_pid": multiprocessing.current_process().pid, "metrics": metrics.drain()}
+    if hasattr(client, "stats"):
+        stats["requests"] = client.stats()
+    if hasattr(client, "batch_stats"):
+        stats["batching"] = client.batch_stats()
+    if cache is not None:
+        stats["cache"] = cache.stats()
+    return stats
+
+
+def worker_main(worker_id, client_options, cache_options, log_options, threads, tasks, results,
+                stream_events=False, stop_event=None, adjudication_options=None):
+    configure_logging(**log_options)
+    cache = MoveCache(**cache_options) if cache_options else None
+    adjudicator = None
+    try:
+        client = build_client(cache=cache, **client_options)
+        adjudicator = build_adjudicator(**adjudication_options) if adjudication_options else None
+        on_event = (lambda event: results.put(("event", worker_id, event))) if stream_events else None
+
+        def play():
+            while True:
+                task = tasks.get()
+                if task is None:
+                    return
+                game_id, white, black, resume, opening = task
+                record = play_game(client, white, black, game_id, on_event=on_event, stop_event=stop_event,
+                                   resume=resume, opening=opening, adjudicator=adjudicator)
+                # Telemetry since the last game goes with each result, so live metrics cover every worker
+                results.put(("metrics", worker_id, metrics.drain()))
+                results.put(("game", worker_id, record))
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for future in [executor.submit(play) for _ in range(threads)]:
+                future.result()
+        results.put(("stats", worker_id, worker_stats(client, cache)))
+    except Exception as e:
+        results.put(("error", worker_id, f"{type(e).__name__}: {e}"))
+    finally:
+        if cache is not None:
+            cache.close()
+        if adjudicator is not None:
+            adjudicator.close()
+
+
+def merge_request_stats(snapshots):
+    merged = {}
+    for stats in snapshots:
+        for model, row in stats.items():
+            total = merged.setdefault(model, dict(dict.fromkeys(REQUEST_COUNTERS, 0), latency_sum=0.0,
+                                                  latency_weight=0, error_rate_sum=0.0))
+            for key in REQUEST_COUNTERS:
+                total[key] += row.get(key, 0)
+            if row.get("latency") is not None:
+                total["latency_sum"] += row["latency"] * row["requests"]
+                total["latency_weight"] += row["requests"]
+            total["error_rate_sum"] += row.get("error_rate", 0.0) * row["requests"]
+
+    for total in merged.values():
+        latency_sum, weight = total.pop("latency_sum"), total.pop("latency_weight")
+        error_rate_sum = total.pop("error_rate_sum")
+        total["latency"] = latency_sum / weight if weight else None
+        total["error_rate"] = error_rate_sum / total["requests"] if total["requests"] else 0.0
+    return merged
+
+
+def merge_batch_stats(snapshots):
+    if not snapshots:
+        return None
+    merged = {key: sum(stats[key] for stats in snapshots) for key in BATCH_COUNTERS}
+    merged.update((key, snapshots[0][key]) for key in ("window", "max_batch_size"))
+    merged["mean_batch_size"] = merged["moves"] / merged["batches"] if merged["batches"] else 0.0
+    return merged
+
+
+def merge_cache_stats(snapshots):
+    if not snapshots:
+        return None
+    merged = {key: sum(stats[key] for stats in snapshots) for key in CACHE_COUNTERS}
+    hits = merged["memory_hits"] + merged["disk_hits"]
+    lookups = hits + merged["misses"]
+    merged["hit_rate"] = hits / lookups if lookups else 0.0
+    # Every worker counts the same shared file; the last one to finish saw it last
+    merged["disk_bytes"] = snapshots[-1]["disk_bytes"]
+    return merged
+
+
+class ProcessTournamentRunner(TournamentRunner):
+    def __init__(self, client_options, models, workers=None, cache_options=None, log_options=None,
+                 poll_interval=1.0, adjudication_options=None, **options):
+        self.client_options = dict(client_options)
+        self.adjudication_options = adjudication_options
+        self.cache_options = cache_options
+        self.log_options = log_options or {}
+        self.poll_interval = poll_interval
+        self.processes = []
+        self.tasks = None
+        self.results = None
+        self.worker_stats = {}
+        super().__init__(None, models, **options)
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = self.context.Event()
+        self.workers = max(1, min(workers or multiprocessing.cpu_count(), self.concurrency))
+        self.threads = math.ceil(self.concurrency / self.workers)
+
+    def configure_client(self):
+        pass
+
+    def worker_client_options(self):
+        client_options = dict(self.client_options)
+        scheduler_options = client_options.get("scheduler_options") or {}
+        client_options["scheduler_options"] = dict(
+            scheduler_options,
+            rate=scheduler_options.get("rate", DEFAULT_RATE) / self.workers,
+            burst=max(1, scheduler_options.get("burst", 5) // self.workers),
+            max_concurrency=self.threads,
+        )
+        return client_options
+
+    def worker_adjudication_options(self):
+        if not self.adjudication_options:
+            return None
+        return dict(self.adjudication_options,
+                    engine_pool=math.ceil(self.adjudication_options.get("engine_pool", 1) / self.workers))
+
+    def start_workers(self):
+        context = self.context
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        client_options = self.worker_client_options()
+        adjudication_options = self.worker_adjudication_options()
+        for worker_id in range(self.workers):
+            process = context.Process(
+                target=worker_main,
+                args=(worker_id, client_options, self.cache_options, self.log_options, self.threads,
+                      self.tasks, self.results, self.event_sink is not None, self.stop_event, adjudication_options),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        log_event(logger, logging.INFO, "workers_started", workers=self.workers, threads=self.threads)
+
+    def receive(self):
+        while True:
+            try:
+                return self.results.get(timeout=self.poll_interval)
+            except queue.Empty:
+                dead = [p for p in self.processes if not p.is_alive() and p.exitcode]
+                if dead:
+                    raise RuntimeError(f"Worker process {dead[0].pid} exited with code {dead[0].exitcode}")
+
+    def handle(self, message):
+        kind, worker_id, payload = message
+        if kind == "error":
+            raise RuntimeError(f"Worker {worker_id} failed: {payload}")
+        if kind == "event":
+            self.event_sink(payload)
+            return False
+        if kind == "metrics":
+            metrics.merge(payload)
+            return False
+        if kind == "stats":
+            metrics.merge(payload.pop("metrics"))
+            self.worker_stats[worker_id] = payload
+            return False
+        self.record_game(payload)
+        return True
+
+    def run(self):
+        started = self.run_started = time.time()
+        self.start_workers()
+        try:
+            for pairings in self.schedule():
+                if self.stop_event.is_set():
+                    break
+                self.play_all(pairings)
+            self.stop_workers()
+        finally:
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+        self.elapsed = time.time() - started
+        return self.report()
+
+    def play_all(self, pairings):
+        tasks = self.prepare(pairings)
+        for task in tasks:
+            self.tasks.put(task)
+        remaining = len(tasks)
+        while remaining:
+            remaining -= self.handle(self.receive())
+
+    def stop_workers(self):
+        for _ in range(self.workers * self.threads):
+            self.tasks.put(None)
+        while len(self.worker_stats) < self.workers:
+            self.handle(self.receive())
+        for process in self.processes:
+            process.join()
+
+    def report(self):
+        report = super().report()
+        snapshots = list(self.worker_stats.values())
+        report["workers"] = len(self.processes)
+        report["requests"] = merge_request_stats(stats["requests"] for stats in snapshots if "requests" in stats)
+        batching = merge_batch_stats([stats["batching"] for stats in snapshots if "batching" in stats])
+        if batching:
+            report["batching"] = batching
+        cache = merge_cache_stats([stats["cache"] for stats in snapshots if "cache" in stats])
+        if cache:
+            report["cache"] = cache
+        return report
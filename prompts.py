@@ -0,0 +1,115 @@
+import fnmatch
+import zlib
+
+from chess_engine import fen_to_board
+
+SYSTEM_PROMPT = "You are a chess engine. You must respond with ONLY a valid chess move in UCI notation. Examples: e2e4, g1f3, d7d5, a7a8q. Respond with exactly 4 or 5 characters, nothing else."
+
+CHARS_PER_TOKEN = 4
+
+DEFAULT_TEMPLATE = "fen_moves"
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def ascii_board(board_fen):
+    rows = [" ".join(row) + f"  {8 - rank}" for rank, row in enumerate(fen_to_board(board_fen))]
+    return "\n".join(rows + ["a b c d e f g h"])
+
+
+class PromptTemplate:
+    def __init__(self, name, prefix, body, instruction, system=SYSTEM_PROMPT, uses_history=False):
+        self.name = name
+        self.prefix = prefix
+        self.body = body
+        self.instruction = instruction
+        self.system = system
+        self.uses_history = uses_history
+        self.system_message = {"role": "system", "content": system}
+        self.prefix_tokens = estimate_tokens(system) + estimate_tokens(prefix)
+
+    def render(self, board_fen, legal_moves, current_player, history=None):
+        return self.prefix + self.body(board_fen, legal_moves, current_player, history) + self.instruction
+
+    def messages(self, board_fen, legal_moves, current_player, history=None):
+        return [self.system_message,
+                {"role": "user", "content": self.render(board_fen, legal_moves, current_player, history)}]
+
+    def estimate_tokens(self, prompt):
+        return self.prefix_tokens + estimate_tokens(prompt[len(self.prefix):])
+
+
+def fen_body(board_fen, legal_moves, current_player, history):
+    return f"Position: {board_fen}\nPlayer: {current_player}\n"
+
+
+def fen_moves_body(board_fen, legal_moves, current_player, history):
+    return f"Position: {board_fen}\nPlayer: {current_player}\nValid moves: {' '.join(legal_moves)}\n"
+
+
+def ascii_body(board_fen, legal_moves, current_player, history):
+    return f"{ascii_board(board_fen)}\nPlayer: {current_player}\nValid moves: {' '.join(legal_moves)}\n"
+
+
+def pgn_body(board_fen, legal_moves, current_player, history):
+    return f"Moves so far: {history or 'none'}\nPlayer: {current_player}\nValid moves: {' '.join(legal_moves)}\n"
+
+
+TEMPLATES = {template.name: template for template in (
+    PromptTemplate("fen", "Find the best move in this chess position.\n\n", fen_body,
+                   "\nPick ONE legal move for the player to move. Reply with exactly 4-5 characters only:"),
+    PromptTemplate("fen_moves", "Find the best move in this chess position.\n\n", fen_moves_body,
+                   "\nPick ONE move from the valid moves list above. Reply with exactly 4-5 characters only:"),
+    PromptTemplate("ascii", "Find the best move in this chess position. White pieces are upper case, "
+                            "black pieces lower case, empty squares are dots.\n\n", ascii_body,
+                   "\nPick ONE move from the valid moves list above. Reply with exactly 4-5 characters only:"),
+    PromptTemplate("pgn", "Find the best move in this chess game, given its moves so far in PGN.\n\n", pgn_body,
+                   "\nPick ONE move from the valid moves list above. Reply with exactly 4-5 characters only:",
+                   uses_history=True),
+)}
+
+
+class PromptProfiles:
+    def __init__(self, default=DEFAULT_TEMPLATE, profiles=None):
+        self.default = self.resolve(default)
+        self.profiles = [(pattern, self.resolve(names)) for pattern, names in (profiles or [])]
+        self.matches = {}
+
+    @staticmethod
+    def resolve(names):
+        if isinstance(names, str):
+            names = names.split(",")
+        unknown = [name for name in names if name not in TEMPLATES]
+        if unknown:
+            raise ValueError(f"Unknown prompt template: {', '.join(unknown)} (choose from {', '.join(TEMPLATES)})")
+        return [TEMPLATES[name] for name in names]
+
+    @classmethod
+    def parse(cls, default=DEFAULT_TEMPLATE, specs=()):
+        profiles = []
+        for spec in specs:
+            pattern, sep, names = spec.partition("=")
+            if not sep or not pattern or not names:
+                raise ValueError(f"Prompt profiles look like PATTERN=TEMPLATE[,TEMPLATE...], not {spec!r}")
+            profiles.append((pattern, names))
+        return cls(default, profiles)
+
+    def templates_for(self, model):
+        templates = self.matches.get(model)
+        if templates is None:
+            templates = next((templates for pattern, templates in self.profiles if fnmatch.fnmatchcase(model, pattern)),
+                             self.default)
+            self.matches[model] = templates
+        return templates
+
+    def template_for(self, model, board_fen):
+        templates = self.templates_for(model)
+        if len(templates) == 1:
+            return templates[0]
+        # Alternating templates by position keeps the choice stable for the response cache
+        return templates[zlib.crc32(f"{model} {board_fen}".encode("utf-8")) % len(templates)]
+
+
+default_profiles = PromptProfiles()
@@ -0,0 +1,245 @@
+import argparse
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+from game_archive import GameArchive
+
+WHITE_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+GLICKO_SCALE = 173.7178
+ELO_SCALE = 400 / math.log(10)
+
+
+class EloRatings:
+    def __init__(self, k=16.0, initial=1500.0):
+        self.k = k
+        self.initial = initial
+        self.ratings = {}
+
+    def rating(self, model):
+        return self.ratings.get(model, self.initial)
+
+    def expected(self, white, black):
+        return 1 / (1 + 10 ** ((self.rating(black) - self.rating(white)) / 400))
+
+    def update(self, white, black, score):
+        change = self.k * (score - self.expected(white, black))
+        self.ratings[white] = self.rating(white) + change
+        self.ratings[black] = self.rating(black) - change
+
+
+def glicko_g(phi):
+    return 1 / math.sqrt(1 + 3 * phi * phi / (math.pi * math.pi))
+
+
+class Glicko2Ratings:
+    def __init__(self, tau=0.5, initial=1500.0, deviation=350.0, volatility=0.06, tolerance=1e-6):
+        self.tau = tau
+        self.initial = initial
+        self.deviation = deviation
+        self.volatility = volatility
+        self.tolerance = tolerance
+        self.players = {}
+
+    def player(self, model):
+        player = self.players.get(model)
+        if player is None:
+            player = self.players[model] = (0.0, self.deviation / GLICKO_SCALE, self.volatility)
+        return player
+
+    def rating(self, model):
+        mu, phi, sigma = self.player(model)
+        return self.initial + mu * GLICKO_SCALE, phi * GLICKO_SCALE, sigma
+
+    def new_volatility(self, phi, sigma, v, delta):
+        a = math.log(sigma * sigma)
+        tau2 = self.tau * self.tau
+
+        def f(x):
+            ex = math.exp(x)
+            return ex * (delta * delta - phi * phi - v - ex) / (2 * (phi * phi + v + ex) ** 2) - (x - a) / tau2
+
+        low = a
+        if delta * delta > phi * phi + v:
+            high = math.log(delta * delta - phi * phi - v)
+        else:
+            k = 1
+            while f(a - k * self.tau) < 0:
+                k += 1
+            high = a - k * self.tau
+
+        f_low, f_high = f(low), f(high)
+        while abs(high - low) > self.tolerance:
+            middle = low + (low - high) * f_low / (f_high - f_low)
+            f_middle = f(middle)
+            if f_middle * f_high <= 0:
+                low, f_low = high, f_high
+            else:
+                f_low /= 2
+            high, f_high = middle, f_middle
+        return math.exp(low / 2)
+
+    def updated(self, player, opponent, score):
+        mu, phi, sigma = player
+        opponent_mu, opponent_phi, _ = opponent
+        g = glicko_g(opponent_phi)
+        expected = 1 / (1 + math.exp(-g * (mu - opponent_mu)))
+        v = 1 / (g * g * expected * (1 - expected))
+        delta = v * g * (score - expected)
+
+        sigma = self.new_volatility(phi, sigma, v, delta)
+        phi = 1 / math.sqrt(1 / (phi * phi + sigma * sigma) + 1 / v)
+        return mu + phi * phi * g * (score - expected), phi, sigma
+
+    def update(self, white, black, score):
+        white_player, black_player = self.player(white), self.player(black)
+        self.players[white] = self.updated(white_player, black_player, score)
+        self.players[black] = self.updated(black_player, white_player, 1 - score)
+
+
+def bradley_terry(points, games, iterations=200, prior=1.0):
+    points = points + prior / 2 * (games > 0)
+    games = games + prior * (games > 0)
+    totals = points.sum(axis=-1)
+    played = games.sum(axis=-1) > 0
+    strengths = np.ones(totals.shape)
+    for _ in range(iterations):
+        denominators = (games / (strengths[..., :, None] + strengths[..., None, :])).sum(axis=-1)
+        strengths = np.where(played, totals / np.where(played, denominators, 1.0), 1.0)
+        strengths /= np.exp(np.log(strengths).mean(axis=-1, keepdims=True))
+    return ELO_SCALE * np.log(strengths)
+
+
+class RatingEngine:
+    def __init__(self, models=(), k=16.0, tau=0.5, initial=1500.0):
+        self.lock = threading.Lock()
+        self.initial = initial
+        self.elo = EloRatings(k, initial)
+        self.glicko = Glicko2Ratings(tau, initial)
+        self.index = {}
+        self.results = np.zeros((0, 0, 3), dtype=np.int64)
+        for model in models:
+            self.add_model(model)
+
+    def add_model(self, model):
+        if model in self.index:
+            return self.index[model]
+        self.index[model] = len(self.index)
+        n = len(self.index)
+        if n > len(self.results):
+            size = max(n, 2 * len(self.results))
+            results = np.zeros((size, size, 3), dtype=np.int64)
+            results[:len(self.results), :len(self.results)] = self.results
+            self.results = results
+        return self.index[model]
+
+    def record(self, white, black, result):
+        score = WHITE_SCORES.get(result)
+        if score is None:
+            return False
+        with self.lock:
+            i, j = self.add_model(white), self.add_model(black)
+            outcome = 0 if score == 1.0 else 1 if score == 0.5 else 2
+            self.results[i, j, outcome] += 1
+            self.results[j, i, 2 - outcome] += 1
+            self.elo.update(white, black, score)
+            self.glicko.update(white, black, score)
+        return True
+
+    def record_all(self, records):
+        return sum(self.record(record["white"], record["black"], record["result"]) for record in records)
+
+    def matrix(self):
+        n = len(self.index)
+        return self.results[:n, :n].copy()
+
+    def bootstrap(self, samples=1000, confidence=0.95, seed=None, prior=1.0):
+        with self.lock:
+            results = self.matrix()
+            models = list(self.index)
+        n = len(models)
+        games = results.sum(axis=-1)
+        points = results[..., 0] + 0.5 * results[..., 1]
+        estimate = bradley_terry(points, games, prior=prior)
+
+        rows, cols = np.nonzero(np.triu(games, 1))
+        points = np.zeros((samples, n, n))
+        if len(rows):
+            rng = np.random.default_rng(seed)
+            # A pseudo-count on every outcome keeps sweeps, all-draw pairings and single games from resampling to
+            # themselves
+            counts = results[rows, cols] + prior
+            draws = rng.multinomial(games[rows, cols], counts / counts.sum(axis=-1, keepdims=True),
+                                    size=(samples, len(rows)))
+            points[:, rows, cols] = draws[..., 0] + 0.5 * draws[..., 1]
+            points[:, cols, rows] = draws[..., 2] + 0.5 * draws[..., 1]
+        sampled = bradley_terry(points, games, prior=prior)
+
+        tail = (1 - confidence) / 2 * 100
+        low, high = np.percentile(sampled, [tail, 100 - tail], axis=0)
+        played = games.sum(axis=-1) > 0
+        return {
+            model: {"rating": float(self.initial + estimate[i]), "low": float(self.initial + low[i]),
+                    "high": float(self.initial + high[i])} if played[i] else None
+            for i, model in enumerate(models)
+        }
+
+    def leaderboard(self, bootstrap_samples=0, seed=None):
+        with self.lock:
+            games = self.matrix().sum(axis=(1, 2))
+            rows = []
+            for model, i in self.index.items():
+                glicko, deviation, volatility = self.glicko.rating(model)
+                rows.append({"model": model, "games": int(games[i]), "elo": self.elo.rating(model),
+                             "glicko": glicko, "deviation": deviation, "volatility": volatility})
+        if bootstrap_samples:
+            intervals = self.bootstrap(bootstrap_samples, seed=seed)
+            for row in rows:
+                row["performance"] = intervals[row["model"]]
+            return sorted(rows, key=lambda row: (row["performance"] is None,
+                                                 -(row["performance"] or {}).get("rating", row["glicko"]),
+                                                 row["model"]))
+        return sorted(rows, key=lambda row: (-row["glicko"], row["model"]))
+
+
+def load_records(path):
+    if os.path.isdir(path):
+        with GameArchive(path) as archive:
+            return [archive.describe(entry) for entry in archive.index().values()]
+    with open(path, "r") as f:
+        return json.load(f)["records"]
+
+
+def print_leaderboard(rows):
+    print(f"{'Model':<45} {'G':>6} {'Elo':>7} {'Glicko':>7} {'RD':>5} {'Perf':>7} {'95% CI':>15}")
+    for row in rows:
+        performance = row.get("performance")
+        perf, interval = "-", "-"
+        if performance:
+            perf = f"{performance['rating']:.0f}"
+            interval = f"{performance['low']:.0f}..{performance['high']:.0f}"
+        print(f"{row['model']:<45} {row['games']:>6} {row['elo']:>7.0f} {row['glicko']:>7.0f} "
+              f"{row['deviation']:>5.0f} {perf:>7} {interval:>15}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate models from finished AI Chess Arena games")
+    parser.add_argument("path", help="A game archive directory or a tournament --output JSON file")
+    parser.add_argument("--k", type=float, default=16.0, help="Elo K-factor")
+    parser.add_argument("--tau", type=float, default=0.5, help="Glicko-2 volatility constraint")
+    parser.add_argument("--bootstrap", type=int, default=1000, metavar="SAMPLES",
+                        help="Bootstrap samples for the performance rating confidence intervals (0 disables)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    engine = RatingEngine(k=args.k, tau=args.tau)
+    engine.record_all(load_records(args.path))
+    print_leaderboard(engine.leaderboard(args.bootstrap, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from arena_logging import get_logger, log_event
+
+logger = get_logger("journal")
+
+JOURNAL_HEADER = "# arena-journal 1"
+
+
+class RunJournal:
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.settings = None
+        self.games = {}
+        self.load()
+        self.file = open(path, "a", encoding="utf-8")
+        if self.file.tell() == 0:
+            self.write(JOURNAL_HEADER)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        skipped = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self.apply(line.rstrip("\n"))
+                except (KeyError, IndexError, ValueError):
+                    skipped += 1
+        if skipped:
+            log_event(logger, logging.WARNING, "journal_lines_skipped", path=self.path, lines=skipped)
+        log_event(logger, logging.INFO, "journal_loaded", path=self.path, games=len(self.games),
+                  finished=sum(self.finished_record(game_id) is not None for game_id in self.games))
+
+    def apply(self, line):
+        if not line or line.startswith("#"):
+            return
+        kind, _, rest = line.partition(" ")
+        if kind == "S":
+            self.settings = json.loads(rest)
+        elif kind == "G":
+            fields = rest.split(" ", 4)
+            game_id, started_at, white, black = fields[:4]
+            self.games[int(game_id)] = {"white": white, "black": black, "started_at": float(started_at),
+                                        "opening": json.loads(fields[4]) if len(fields) > 4 else None,
+                                        "moves": [], "fallback_moves": [], "record": None}
+        elif kind == "M":
+            fields = rest.split(" ")
+            game = self.games[int(fields[0])]
+            game["moves"].append(fields[1])
+            if len(fields) > 2 and fields[2] == "f":
+                game["fallback_moves"].append(len(game["moves"]))
+        elif kind == "R":
+            record = json.loads(rest)
+            self.games[record["game_id"]]["record"] = record
+        else:
+            raise ValueError(f"Unknown journal entry: {kind}")
+
+    def write(self, line):
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+
+    def begin(self, settings):
+        if self.settings is not None:
+            if self.settings != settings:
+                raise ValueError(f"Journal {self.path} was written for a different tournament: {self.settings}")
+            return
+        self.settings = settings
+        self.write(f"S {json.dumps(settings, separators=(',', ':'))}")
+
+    def game_started(self, game_id, white, black, started_at=None, opening=None):
+        if game_id in self.games:
+            return
+        started_at = time.time() if started_at is None else started_at
+        self.games[game_id] = {"white": white, "black": black, "started_at": started_at, "opening": opening,
+                               "moves": [], "fallback_moves": [], "record": None}
+        line = f"G {game_id} {started_at:.3f} {white} {black}"
+        if opening is not None:
+            line += f" {json.dumps(opening, separators=(',', ':'))}"
+        self.write(line)
+
+    def move(self, game_id, move, fallback=False):
+        game = self.games[game_id]
+        game["moves"].append(move)
+        if fallback:
+            game["fallback_moves"].append(len(game["moves"]))
+        self.write(f"M {game_id} {move} f" if fallback else f"M {game_id} {move}")
+
+    def finished(self, record):
+        self.games[record["game_id"]]["record"] = record
+        self.write(f"R {json.dumps(record, separators=(',', ':'))}")
+
+    def handle_event(self, event):
+        if event["event"] == "game_started":
+            self.game_started(event["game_id"], event["white"], event["black"], opening=event.get("opening"))
+        elif event["event"] == "move":
+            self.move(event["game_id"], event["move"], event["fallback"])
+
+    def finished_record(self, game_id):
+        game = self.games.get(game_id)
+        if game is None or game["record"] is None or game["record"]["result"] == "*":
+            return None
+        return game["record"]
+
+    def lookup(self, game_id, white, black):
+        game = self.games.get(game_id)
+        if game is None:
+            return None, None
+        if (game["white"], game["black"]) != (white, black):
+            raise ValueError(f"Journal game {game_id} was {game['white']} vs {game['black']}, "
+                             f"not {white} vs {black}")
+        record = self.finished_record(game_id)
+        if record is not None:
+            return record, None
+        game["record"] = None
+        return None, {"moves": list(game["moves"]), "fallback_moves": list(game["fallback_moves"]),
+                      "started_at": game["started_at"], "opening": game["opening"]}
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+import httpx
+import requests
+
+from arena_logging import get_logger, log_event
+from metrics import metrics
+from openrouter_client import RateLimitError
+
+logger = get_logger("scheduler")
+
+DEFAULT_RATE = 1.0
+
+
+class RetryBudgetExceeded(Exception):
+    def __init__(self, model, attempts, last_error):
+        super().__init__(f"{model}: gave up after {attempts} attempts ({last_error})")
+        self.model = model
+        self.attempts = attempts
+        self.last_error = last_error
+
+
+def classify_error(error):
+    if isinstance(error, RateLimitError):
+        return "rate_limited"
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          httpx.TransportError)):
+        return "transient"
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is not None:
+        return "transient" if status >= 500 else "fatal"
+    # A body that is not JSON or lacks the expected fields; anything else (a missing API key, a bug) is fatal
+    if isinstance(error, (json.JSONDecodeError, KeyError, IndexError, TypeError, AttributeError)):
+        return "invalid_response"
+    return "fatal"
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        return max(wait, self.blocked_until - now)
+
+    def block_for(self, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, initial=4, minimum=1, maximum=64, latency_tolerance=2.0,
+                 error_threshold=0.2, smoothing=0.2):
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.smoothing = smoothing
+        self.latency = None
+        self.best_latency = None
+        self.error_rate = 0.0
+
+    @property
+    def allowed(self):
+        return int(self.limit)
+
+    def on_success(self, latency):
+        self.error_rate *= 1 - self.smoothing
+        self.latency = latency if self.latency is None else (
+            self.smoothing * latency + (1 - self.smoothing) * self.latency)
+        self.best_latency = self.latency if self.best_latency is None else min(self.best_latency, self.latency)
+
+        if self.latency > self.best_latency * self.latency_tolerance:
+            self.limit = max(self.minimum, self.limit * 0.9)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_error(self, rate_limited=False):
+        self.error_rate = self.smoothing + (1 - self.smoothing) * self.error_rate
+        if rate_limited or self.error_rate > self.error_threshold:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class ModelBudget:
+    def __init__(self, rate, burst, initial_concurrency, max_concurrency):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, maximum=max_concurrency)
+        self.in_flight = 0
+        self.stats = {"requests": 0, "rate_limited": 0, "errors": 0, "retries": 0, "gave_up": 0,
+                      "invalid_responses": 0}
+
+    def snapshot(self):
+        return dict(
+            self.stats,
+            in_flight=self.in_flight,
+            concurrency_limit=self.concurrency.allowed,
+            latency=self.concurrency.latency,
+            error_rate=self.concurrency.error_rate,
+        )
+
+
+class BaseRequestScheduler:
+    def __init__(self, client, rate=DEFAULT_RATE, burst=5, initial_concurrency=4, max_concurrency=64,
+                 max_retries=8, base_delay=1.0, max_delay=60.0, rng=None):
+        self.client = client
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+        self.budgets = {}
+
+    def budget(self, model):
+        if model not in self.budgets:
+            self.budgets[model] = ModelBudget(self.rate, self.burst, self.initial_concurrency, self.max_concurrency)
+        return self.budgets[model]
+
+    def start_request(self, budget):
+        budget.in_flight += 1
+        budget.stats["requests"] += 1
+        return budget.bucket.reserve()
+
+    def finish_request(self, budget, latency=None, error=None):
+        budget.in_flight -= 1
+        if error is None:
+            budget.concurrency.on_success(latency)
+            return None
+
+        kind = classify_error(error)
+        if kind == "invalid_response":
+            budget.stats["invalid_responses"] += 1
+            budget.concurrency.on_success(latency)
+            return kind
+
+        budget.stats["rate_limited" if kind == "rate_limited" else "errors"] += 1
+        budget.concurrency.on_error(kind == "rate_limited")
+        log_event(logger, logging.INFO, kind, error=str(error), concurrency_limit=budget.concurrency.allowed)
+        if kind == "rate_limited" and error.retry_after is not None:
+            budget.bucket.block_for(error.retry_after)
+        return kind
+
+    def retry_delay(self, budget, model, attempt, error):
+        if attempt >= self.max_retries:
+            budget.stats["gave_up"] += 1
+            log_event(logger, logging.WARNING, "retries_exhausted", model=model, attempts=attempt + 1)
+            raise RetryBudgetExceeded(model, attempt + 1, error)
+        budget.stats["retries"] += 1
+        metrics.inc("arena_retries_total", model=model, reason=classify_error(error))
+        retry_after = getattr(error, 'retry_after', None) or 0.0
+        return max(retry_after, backoff_delay(attempt, self.base_delay, self.max_delay, self.rng))
+
+    def stats(self):
+        return {model: budget.snapshot() for model, budget in self.budgets.items()}
+
+
+class RequestScheduler(BaseRequestScheduler):
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self.condition = threading.Condition()
+
+    @property
+    def session(self):
+        return self.client.session
+
+    def cached_move(self, model, board_fen, legal_moves, current_player, history=None, batch=False):
+        return self.client.cached_move(model, board_fen, legal_moves, current_player, history, batch)
+
+    def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        move = self.client.cached_move(model, board_fen, legal_moves, current_player, history)
+        if move is not None:
+            return move
+        return self.send(model, lambda: self.client.request_move(model, board_fen, legal_moves, current_player,
+                                                                 check_cache=False, history=history))
+
+    def get_moves(self, model, positions):
+        # A whole batch takes one slot and one token, and a 429 retries the batch rather than each position
+        return self.send(model, lambda: self.client.request_moves(model, positions), [None] * len(positions))
+
+    def send(self, model, request, invalid=None):
+        attempt = 0
+        while True:
+            with self.condition:
+                budget = self.budget(model)
+                while budget.in_flight >= budget.concurrency.allowed:
+                    self.condition.wait()
+                delay = self.start_request(budget)
+            if delay:
+                time.sleep(delay)
+
+            started = time.monotonic()
+            try:
+                result = request()
+            except Exception as e:
+                with self.condition:
+                    kind = self.finish_request(budget, time.monotonic() - started, error=e)
+                    self.condition.notify_all()
+                    if kind == "fatal":
+                        raise
+                    if kind == "invalid_response":
+                        return invalid
+                    delay = self.retry_delay(budget, model, attempt, e)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            with self.condition:
+                self.finish_request(budget, latency=time.monotonic() - started)
+                self.condition.notify_all()
+            return result
+
+
+class AsyncRequestScheduler(BaseRequestScheduler):
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self.condition = None
+
+    def cached_move(self, model, board_fen, legal_moves, current_player, history=None, batch=False):
+        return self.client.cached_move(model, board_fen, legal_moves, current_player, history, batch)
+
+    async def get_move(self, model, board_fen, legal_moves, current_player, history=None):
+        move = self.client.cached_move(model, board_fen, legal_moves, current_player, history)
+        if move is not None:
+            return move
+        return await self.send(model, lambda: self.client.request_move(model, board_fen, legal_moves, current_player,
+                                                                       check_cache=False, history=history))
+
+    async def get_moves(self, model, positions):
+        return await self.send(model, lambda: self.client.request_moves(model, positions), [None] * len(positions))
+
+    async def send(self, model, request, invalid=None):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+
+        attempt = 0
+        while True:
+            async with self.condition:
+                budget = self.budget(model)
+                await self.condition.wait_for(lambda: budget.in_flight < budget.concurrency.allowed)
+                delay = self.start_request(budget)
+            if delay:
+                await asyncio.sleep(delay)
+
+            started = time.monotonic()
+            try:
+                result = await request()
+            except Exception as e:
+                async with self.condition:
+                    kind = self.finish_request(budget, time.monotonic() - started, error=e)
+                    self.condition.notify_all()
+                    if kind == "fatal":
+                        raise
+                    if kind == "invalid_response":
+                        return invalid
+                    delay = self.retry_delay(budget, model, attempt, e)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            async with self.condition:
+                self.finish_request(budget, latency=time.monotonic() - started)
+                self.condition.notify_all()
+            return result
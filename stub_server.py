@@ -0,0 +1,198 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_MODELS = [
+    {"id": "stub/first-move", "pricing": {"prompt": "0", "completion": "0"}, "context_length": 8192},
+    {"id": "stub/random-move", "pricing": {"prompt": "0", "completion": "0"}, "context_length": 8192},
+    {"id": "stub/chatty-move", "pricing": {"prompt": "0", "completion": "0"}, "context_length": 8192},
+]
+
+CHATTY_FILLER = ("because it develops a piece, fights for the centre and keeps the king safe while "
+                 "preparing to castle and connect the rooks in the middlegame").split()
+
+MODELS_ETAG = '"stub-models-1"'
+
+VALID_MOVES_PATTERN = re.compile(r"Valid moves: (.*)")
+
+
+def choose_move(model, valid_moves, rng):
+    moves = [m for m in re.split(r"[,\s]+", valid_moves) if m]
+    if not moves:
+        return "e2e4"
+    if model.endswith("random-move"):
+        return rng.choice(moves)
+    return moves[0]
+
+
+def pick_move(model, prompt, rng):
+    match = VALID_MOVES_PATTERN.search(prompt)
+    return choose_move(model, match.group(1) if match else "", rng)
+
+
+def completion_text(model, move):
+    if model.endswith("chatty-move"):
+        return f"Move: {move} " + " ".join(CHATTY_FILLER)
+    return move
+
+
+def pick_batch(model, prompt, rng):
+    moves = [choose_move(model, valid_moves, rng) for valid_moves in VALID_MOVES_PATTERN.findall(prompt)]
+    return json.dumps({str(number): move for number, move in enumerate(moves, 1)})
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, model, text, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(b": OPENROUTER PROCESSING\n\n")
+            for token in re.findall(r"\S+\s*", text):
+                chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+            final = {"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/api/v1/models":
+            if self.headers.get("If-None-Match") == MODELS_ETAG:
+                self.send_response(304)
+                self.send_header("ETag", MODELS_ETAG)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_json(200, {"data": STUB_MODELS}, {"ETag": MODELS_ETAG})
+        else:
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/") != "/api/v1/chat/completions":
+            self.send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        model = body.get("model", "")
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        with self.server.lock:
+            rate_limited = self.server.rng.random() < self.server.rate_limit_probability
+            if body.get("response_format"):
+                move = pick_batch(model, prompt, self.server.rng)
+            else:
+                move = pick_move(model, prompt, self.server.rng)
+            self.server.requests_served += 1
+
+        if rate_limited:
+            data = json.dumps({"error": {"code": 429, "message": "Rate limit exceeded"}}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Retry-After", str(self.server.retry_after))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        text = move if body.get("response_format") else completion_text(model, move)
+        completion_tokens = len(text.split()) + 1
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion_tokens,
+                 "total_tokens": len(prompt) // 4 + completion_tokens}
+        if body.get("stream"):
+            self.send_stream(model, text, usage)
+            return
+        if self.server.token_delay:
+            time.sleep(self.server.token_delay * len(re.findall(r"\S+\s*", text)))
+
+        self.send_json(200, {
+            "id": f"stub-{self.server.requests_served}",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+
+class StubOpenRouterServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, seed=0, rate_limit_probability=0.0, retry_after=1,
+                 token_delay=0.0):
+        super().__init__((host, port), StubRequestHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests_served = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stub of the OpenRouter chat completions and models API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering each move")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between streamed tokens, and per token before answering a non-streamed request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0,
+                        help="Fraction of move requests answered with 429 Too Many Requests")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with each 429")
+    args = parser.parse_args(argv)
+
+    server = StubOpenRouterServer(args.host, args.port, latency=args.latency, seed=args.seed,
+                                  rate_limit_probability=args.rate_limit_probability,
+                                  retry_after=args.retry_after, token_delay=args.token_delay)
+    print(f"Stub OpenRouter API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
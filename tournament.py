@@ -0,0 +1,816 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from requests.adapters import HTTPAdapter
+
+from adjudication import ADJUDICATION_MODES, build_adjudicator
+from arena_logging import configure_logging, get_logger, log_context, log_event, update_log_context
+from chess_engine import ChessGame
+from game_archive import GameArchive
+from match_scheduler import AdaptiveScheduler
+from metrics import MetricsServer, MetricsSnapshotWriter, metrics, summarize, summarize_prompts
+from model_catalog import DEFAULT_CATALOG_PATH, ModelCatalog
+from move_batcher import AsyncMoveBatcher, MoveBatcher
+from move_cache import MoveCache
+from openings import Opening, OpeningBook
+from prompts import DEFAULT_TEMPLATE, TEMPLATES, PromptProfiles
+from openrouter_client import OpenRouterClient
+from ratings import RatingEngine, print_leaderboard
+from run_journal import RunJournal
+from scheduler import DEFAULT_RATE, AsyncRequestScheduler, RequestScheduler
+
+logger = get_logger("tournament")
+
+PAIRING_SCHEMES = ("round-robin", "gauntlet", "swiss", "adaptive")
+
+RESULT_POINTS = {
+    "1-0": (1.0, 0.0),
+    "0-1": (0.0, 1.0),
+    "1/2-1/2": (0.5, 0.5),
+}
+
+
+def round_robin_pairings(models, games_per_pair=2):
+    pairings = []
+    for i, first in enumerate(models):
+        for second in models[i + 1:]:
+            for n in range(games_per_pair):
+                pairings.append((first, second) if n % 2 == 0 else (second, first))
+    return pairings
+
+
+def gauntlet_pairings(models, games_per_pair=2):
+    champion, challengers = models[0], models[1:]
+    pairings = []
+    for challenger in challengers:
+        for n in range(games_per_pair):
+            pairings.append((champion, challenger) if n % 2 == 0 else (challenger, champion))
+    return pairings
+
+
+def swiss_pairings(standings, played, colors):
+    ranked = sorted(standings.models(), key=lambda m: (-standings.score(m), m))
+    pairings = []
+    bye = None
+
+    if len(ranked) % 2 == 1:
+        for model in reversed(ranked):
+            if (model, None) not in played:
+                bye = model
+                break
+        if bye is None:
+            bye = ranked[-1]
+        ranked.remove(bye)
+
+    while ranked:
+        first = ranked.pop(0)
+        opponent = next((m for m in ranked if frozenset((first, m)) not in played), ranked[0])
+        ranked.remove(opponent)
+        if colors.get(first, 0) <= colors.get(opponent, 0):
+            pairings.append((first, opponent))
+        else:
+            pairings.append((opponent, first))
+
+    return pairings, bye
+
+
+class Standings:
+    def __init__(self, models):
+        self.lock = threading.Lock()
+        self.table = {
+            model: {"games": 0, "wins": 0, "draws": 0, "losses": 0, "score": 0.0}
+            for model in models
+        }
+
+    def models(self):
+        return list(self.table)
+
+    def score(self, model):
+        return self.table[model]["score"]
+
+    def add_bye(self, model):
+        with self.lock:
+            self.table[model]["score"] += 1.0
+
+    def record(self, white, black, result):
+        if result not in RESULT_POINTS:
+            return
+        white_points, black_points = RESULT_POINTS[result]
+        with self.lock:
+            for model, points in ((white, white_points), (black, black_points)):
+                row = self.table[model]
+                row["games"] += 1
+                row["score"] += points
+                if points == 1.0:
+                    row["wins"] += 1
+                elif points == 0.5:
+                    row["draws"] += 1
+                else:
+                    row["losses"] += 1
+
+    def ranking(self):
+        with self.lock:
+            rows = [dict(model=model, **row) for model, row in self.table.items()]
+        return sorted(rows, key=lambda row: (-row["score"], row["model"]))
+
+
+def begin_ply(game, white_model, black_model):
+    model = white_model if game.current_turn == 'white' else black_model
+    update_log_context(ply=len(game.move_history) + 1, model=model)
+    return model, game.get_legal_moves()
+
+
+def apply_move(game, move, valid_moves, latency, model=None):
+    if not move:
+        source = "unparsed"
+    elif not game.make_move(move):
+        source = "illegal"
+    else:
+        source = "model"
+    fallback = source != "model"
+    if fallback and (not valid_moves or not game.make_move(random.choice(valid_moves))):
+        return None
+    metrics.inc("arena_moves_total", model=model, source=source)
+    metrics.observe("arena_ply_seconds", latency, model=model)
+    log_event(logger, logging.DEBUG, "move", move=game.move_history[-1], fallback=fallback,
+              latency=round(latency, 4))
+    return fallback
+
+
+def emit(on_event, event, game_id, **fields):
+    if on_event is not None:
+        on_event(dict(fields, event=event, game_id=game_id))
+
+
+def start_game(game_id=None, opening=None, resume=None):
+    game = ChessGame(opening.fen if opening else None)
+    for move in opening.moves if opening else ():
+        game.make_move(move)
+    if resume is None:
+        return game, [], time.time()
+
+    book_plies = len(game.move_history)
+    for move in resume["moves"]:
+        if not game.make_move(move):
+            log_event(logger, logging.WARNING, "resume_move_illegal", game_id=game_id, move=move,
+                      ply=len(game.move_history) + 1)
+            break
+    log_event(logger, logging.INFO, "game_resumed", game_id=game_id, plies=len(game.move_history))
+    return game, [book_plies + ply for ply in resume["fallback_moves"]], resume["started_at"]
+
+
+def play_game(client, white_model, black_model, game_id=None, move_delay=0.0, on_event=None, stop_event=None,
+              resume=None, opening=None, adjudicator=None):
+    game, fallbacks, started = start_game(game_id, opening, resume)
+    tracker = adjudicator.tracker() if adjudicator is not None else None
+    aborted = adjudicated = None
+    emit(on_event, "game_started", game_id, white=white_model, black=black_model, fen=game.get_fen(),
+         opening=list(opening) if opening else None)
+
+    with log_context(game_id=game_id):
+        while not game.is_game_over():
+            if stop_event is not None and stop_event.is_set():
+                aborted = "Aborted: stopped"
+                break
+            model, valid_moves = begin_ply(game, white_model, black_model)
+
+            move_started = time.perf_counter()
+            try:
+                move = client.get_move(model, game.get_fen(), valid_moves, game.current_turn, game.get_movetext())
+            except Exception as e:
+                aborted = f"Aborted: {e}"
+                log_event(logger, logging.WARNING, "game_aborted", error=str(e))
+                break
+
+            latency = time.perf_counter() - move_started
+            fallback = apply_move(game, move, valid_moves, latency, model)
+            if fallback is None:
+                break
+            if fallback:
+                fallbacks.append(len(game.move_history))
+            emit_move(on_event, game, game_id, model, latency, fallback)
+
+            if tracker is not None and not game.is_game_over():
+                adjudicated = tracker.update(game.board)
+                if adjudicated is not None:
+                    break
+
+            if move_delay:
+                time.sleep(move_delay)
+
+    return finish_game(on_event, game_record(game, game_id, white_model, black_model, fallbacks, started, aborted,
+                                             opening, adjudicated))
+
+
+async def play_game_async(client, white_model, black_model, game_id=None, on_event=None, stop_event=None,
+                          resume=None, opening=None, adjudicator=None):
+    game, fallbacks, started = start_game(game_id, opening, resume)
+    tracker = adjudicator.tracker() if adjudicator is not None else None
+    aborted = adjudicated = None
+    emit(on_event, "game_started", game_id, white=white_model, black=black_model, fen=game.get_fen(),
+         opening=list(opening) if opening else None)
+
+    with log_context(game_id=game_id):
+        while not game.is_game_over():
+            if stop_event is not None and stop_event.is_set():
+                aborted = "Aborted: stopped"
+                break
+            model, valid_moves = begin_ply(game, white_model, black_model)
+
+            move_started = time.perf_counter()
+            try:
+                move = await client.get_move(model, game.get_fen(), valid_moves, game.current_turn,
+                                             game.get_movetext())
+            except Exception as e:
+                aborted = f"Aborted: {e}"
+                log_event(logger, logging.WARNING, "game_aborted", error=str(e))
+                break
+
+            latency = time.perf_counter() - move_started
+            fallback = apply_move(game, move, valid_moves, latency, model)
+            if fallback is None:
+                break
+            if fallback:
+                fallbacks.append(len(game.move_history))
+            emit_move(on_event, game, game_id, model, latency, fallback)
+
+            if tracker is not None and not game.is_game_over():
+                adjudicated = await asyncio.to_thread(tracker.update, game.board)
+                if adjudicated is not None:
+                    break
+
+    return finish_game(on_event, game_record(game, game_id, white_model, black_model, fallbacks, started, aborted,
+                                             opening, adjudicated))
+
+
+def emit_move(on_event, game, game_id, model, latency, fallback):
+    if on_event is not None:
+        emit(on_event, "move", game_id, model=model, ply=len(game.move_history), move=game.move_history[-1],
+             fen=game.get_fen(), check=game.is_check(), latency=latency, fallback=fallback)
+
+
+def finish_game(on_event, record):
+    emit(on_event, "game_finished", record["game_id"], result=record["result"], termination=record["termination"],
+         plies=record["plies"], duration=record["duration"])
+    return record
+
+
+def game_record(game, game_id, white_model, black_model, fallbacks, started, aborted=None, opening=None,
+                adjudicated=None):
+    result, termination = adjudicated or (game.get_result(), game.get_game_result())
+    return {
+        "game_id": game_id,
+        "white": white_model,
+        "black": black_model,
+        "result": result,
+        "termination": aborted or termination,
+        "moves": game.get_move_history(),
+        "plies": len(game.move_history),
+        "fallbacks": len(fallbacks),
+        "fallback_plies": fallbacks,
+        "started_at": started,
+        "duration": time.time() - started,
+        "start_fen": opening.fen if opening else None,
+        "book_plies": len(opening.moves) if opening else 0,
+        "opening": opening.name if opening else None,
+    }
+
+
+class TournamentRunner:
+    def __init__(self, client, models, scheme="round-robin", games_per_pair=2,
+                 rounds=None, concurrency=4, on_game_finished=None, on_event=None, journal=None,
+                 bootstrap_samples=1000, sprt_options=None, openings=None, adjudicator=None):
+        if scheme not in PAIRING_SCHEMES:
+            raise ValueError(f"Unknown pairing scheme: {scheme}")
+        if len(models) < 2:
+            raise ValueError("At least two models are required")
+
+        self.client = client
+        self.models = list(models)
+        self.scheme = scheme
+        self.games_per_pair = games_per_pair
+        self.rounds = rounds or max(1, (len(self.models) - 1).bit_length() + 1)
+        self.concurrency = concurrency
+        self.on_game_finished = on_game_finished
+        self.on_event = on_event
+        self.journal = journal
+        self.openings = openings
+        self.adjudicator = adjudicator
+        self.pair_openings = {}
+        self.stop_event = threading.Event()
+
+        self.standings = Standings(self.models)
+        self.ratings = RatingEngine(self.models)
+        self.bootstrap_samples = bootstrap_samples
+        self.sprt_options = dict(sprt_options or {})
+        self.adaptive = None
+        if scheme == "adaptive":
+            self.adaptive = AdaptiveScheduler(self.models, batch_size=concurrency, **self.sprt_options)
+        self.games = []
+        self.restored_games = 0
+        self.next_game_id = 0
+        self.elapsed = 0.0
+        self.run_started = None
+
+        if journal is not None:
+            journal.begin(self.settings())
+        self.configure_client()
+
+    def settings(self):
+        settings = {"models": self.models, "scheme": self.scheme, "games_per_pair": self.games_per_pair,
+                    "rounds": self.rounds}
+        if self.adaptive is not None:
+            settings["sprt"] = self.sprt_options
+        if self.openings is not None:
+            settings["openings"] = self.openings.settings()
+        return settings
+
+    @property
+    def event_sink(self):
+        if self.journal is None:
+            return self.on_event
+        return self.emit_event
+
+    def emit_event(self, event):
+        if self.journal is not None:
+            self.journal.handle_event(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def configure_client(self):
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+        self.client.session.mount("https://", adapter)
+        self.client.session.mount("http://", adapter)
+
+    def pairings(self):
+        if self.scheme == "round-robin":
+            return round_robin_pairings(self.models, self.games_per_pair)
+        return gauntlet_pairings(self.models, self.games_per_pair)
+
+    def schedule(self):
+        if self.adaptive is not None:
+            yield from self.adaptive.rounds()
+            return
+        if self.scheme != "swiss":
+            yield self.pairings()
+            return
+
+        played = set()
+        colors = {}
+        for _ in range(self.rounds):
+            pairings, bye = swiss_pairings(self.standings, played, colors)
+            if bye is not None:
+                played.add((bye, None))
+                self.standings.add_bye(bye)
+            for white, black in pairings:
+                played.add(frozenset((white, black)))
+                colors[white] = colors.get(white, 0) + 1
+                colors[black] = colors.get(black, 0) - 1
+            yield pairings
+
+    def assign_game_ids(self, pairings):
+        numbered = []
+        for white, black in pairings:
+            numbered.append((self.next_game_id, white, black))
+            self.next_game_id += 1
+        return numbered
+
+    def opening_for(self, white, black):
+        if self.openings is None:
+            return None
+        key = frozenset((white, black))
+        opening, games = self.pair_openings.get(key, (None, 0))
+        if games % 2 == 0:
+            opening = self.openings.next_opening()
+        self.pair_openings[key] = (opening, games + 1)
+        return opening
+
+    def prepare(self, pairings):
+        tasks = []
+        for game_id, white, black in self.assign_game_ids(pairings):
+            opening = self.opening_for(white, black)
+            record, resume = self.journal.lookup(game_id, white, black) if self.journal is not None else (None, None)
+            if record is not None:
+                self.restore_game(record)
+            else:
+                if resume is not None and resume["opening"] is not None:
+                    opening = Opening(*resume["opening"])
+                tasks.append((game_id, white, black, resume, opening))
+        return tasks
+
+    def tally(self, record):
+        self.games.append(record)
+        self.standings.record(record["white"], record["black"], record["result"])
+        self.ratings.record(record["white"], record["black"], record["result"])
+        if self.adaptive is not None:
+            self.adaptive.record(record["white"], record["black"], record["result"])
+
+    def restore_game(self, record):
+        self.tally(record)
+        self.restored_games += 1
+        log_event(logger, logging.DEBUG, "game_restored", game_id=record["game_id"], result=record["result"])
+
+    def record_game(self, record):
+        if self.journal is not None:
+            self.journal.finished(record)
+        log_event(logger, logging.INFO, "game_finished", game_id=record["game_id"], white=record["white"],
+                  black=record["black"], result=record["result"], termination=record["termination"],
+                  plies=record["plies"], fallbacks=record["fallbacks"], duration=round(record["duration"], 2))
+        self.tally(record)
+        for model in (record["white"], record["black"]):
+            metrics.set("arena_elo", self.ratings.elo.rating(model), model=model)
+        metrics.inc("arena_games_total", result=record["result"])
+        if self.run_started is not None:
+            hours = (time.time() - self.run_started) / 3600
+            played = len(self.games) - self.restored_games
+            metrics.set("arena_games_per_hour", played / hours if hours else 0.0)
+        if self.on_game_finished:
+            self.on_game_finished(record)
+
+    def run(self):
+        started = self.run_started = time.time()
+        for pairings in self.schedule():
+            if self.stop_event.is_set():
+                break
+            self.play_all(pairings)
+        self.elapsed = time.time() - started
+        return self.report()
+
+    def play_all(self, pairings):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(play_game, self.client, white, black, game_id,
+                                on_event=self.event_sink, stop_event=self.stop_event, resume=resume,
+                                opening=opening, adjudicator=self.adjudicator)
+                for game_id, white, black, resume, opening in self.prepare(pairings)
+            ]
+            for future in as_completed(futures):
+                self.record_game(future.result())
+
+    def stop(self):
+        self.stop_event.set()
+
+    def report(self):
+        hours = self.elapsed / 3600 if self.elapsed else 0
+        report = {
+            "scheme": self.scheme,
+            "games": len(self.games),
+            "elapsed": self.elapsed,
+            "games_per_hour": (len(self.games) - self.restored_games) / hours if hours else 0.0,
+            "standings": self.standings.ranking(),
+            "ratings": self.ratings.leaderboard(self.bootstrap_samples),
+        }
+        if hasattr(self.client, "stats"):
+            report["requests"] = self.client.stats()
+        if hasattr(self.client, "batch_stats"):
+            report["batching"] = self.client.batch_stats()
+        if self.adaptive is not None:
+            report["sprt"] = self.adaptive.summary()
+        report["telemetry"] = summarize()
+        report["prompts"] = summarize_prompts()
+        return report
+
+
+class AsyncTournamentRunner(TournamentRunner):
+    def configure_client(self):
+        pass
+
+    async def run(self):
+        started = self.run_started = time.time()
+        for pairings in self.schedule():
+            if self.stop_event.is_set():
+                break
+            await self.play_all(pairings)
+        self.elapsed = time.time() - started
+        return self.report()
+
+    async def play_all(self, pairings):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def play(game_id, white, black, resume, opening):
+            async with semaphore:
+                record = await play_game_async(self.client, white, black, game_id, on_event=self.event_sink,
+                                               stop_event=self.stop_event, resume=resume, opening=opening,
+                                               adjudicator=self.adjudicator)
+            self.record_game(record)
+
+        await asyncio.gather(*(play(*task) for task in self.prepare(pairings)))
+
+
+def load_api_key(path='config.json'):
+    api_key = os.environ.get('OPENROUTER_API_KEY')
+    if api_key:
+        return api_key
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('api_key')
+    except FileNotFoundError:
+        return None
+
+
+def build_client(api_key, base_url="https://openrouter.ai", cache=None, scheduler_options=None, batch_options=None,
+                 stream=False, prompts=None):
+    api_client = OpenRouterClient(api_key, base_url, cache=cache, stream=stream, prompts=prompts)
+    client = RequestScheduler(api_client, **(scheduler_options or {}))
+    if batch_options:
+        client = MoveBatcher(client, **batch_options)
+    return client
+
+
+def print_report(report):
+    print(f"Scheme: {report['scheme']}")
+    print(f"Games: {report['games']} in {report['elapsed']:.1f}s "
+          f"({report['games_per_hour']:.1f} games/hour)")
+    print()
+    print(f"{'Model':<45} {'Pts':>6} {'G':>4} {'W':>4} {'D':>4} {'L':>4}")
+    for row in report['standings']:
+        print(f"{row['model']:<45} {row['score']:>6.1f} {row['games']:>4} "
+              f"{row['wins']:>4} {row['draws']:>4} {row['losses']:>4}")
+
+    if report.get('ratings'):
+        print()
+        print_leaderboard(report['ratings'])
+
+    if report.get('sprt'):
+        print()
+        print(f"{'Pairing':<60} {'G':>4} {'Abrt':>4} {'Score':>6} {'LLR':>6}  Decision")
+        for row in report['sprt']:
+            decision = row['decision'] or ("undecided" if row['games'] else "-")
+            print(f"{row['first'] + ' vs ' + row['second']:<60} {row['games']:>4} {row['aborted']:>4} "
+                  f"{row['score']:>6.2f} {row['llr']:>6.2f}  {decision}")
+
+    if report.get('requests'):
+        print()
+        print(f"{'Model':<45} {'Req':>6} {'429':>5} {'Err':>5} {'Retry':>6} {'Limit':>6}")
+        for model, stats in sorted(report['requests'].items()):
+            print(f"{model:<45} {stats['requests']:>6} {stats['rate_limited']:>5} {stats['errors']:>5} "
+                  f"{stats['retries']:>6} {stats['concurrency_limit']:>6}")
+
+    if report.get('telemetry'):
+        print()
+        print(f"{'Model':<45} {'p50':>7} {'p95':>7} {'TTFB':>7} {'TTM':>7} {'Tokens':>8} {'Fallback':>9}")
+        for model, row in sorted(report['telemetry'].items()):
+            p50, p95, ttfb, ttm = (f"{row[key]:.2f}s" if row[key] is not None else "-"
+                                   for key in ('latency_p50', 'latency_p95', 'ttfb_p50', 'ttm_p50'))
+            tokens = row['prompt_tokens'] + row['completion_tokens']
+            print(f"{model:<45} {p50:>7} {p95:>7} {ttfb:>7} {ttm:>7} {tokens:>8} {row['fallback_rate']:>9.1%}")
+
+    if report.get('prompts'):
+        print()
+        print(f"{'Model':<45} {'Prompt':<10} {'Req':>6} {'Cached':>6} {'Tokens':>7} {'Illegal':>8} {'p50':>7}")
+        for row in report['prompts']:
+            p50 = f"{row['latency_p50']:.2f}s" if row['latency_p50'] is not None else "-"
+            print(f"{row['model']:<45} {row['template']:<10} {row['requests']:>6} {row['cached']:>6} "
+                  f"{row['prompt_tokens']:>7.0f} {row['illegal_rate']:>8.1%} {p50:>7}")
+
+    if report.get('batching'):
+        batching = report['batching']
+        print()
+        print(f"Batching: {batching['moves']} moves in {batching['batches']} batches "
+              f"(mean size {batching['mean_batch_size']:.1f}), {batching['batch_requests']} batch requests, "
+              f"{batching['unresolved']} positions re-requested singly")
+
+    if report.get('cache'):
+        cache = report['cache']
+        print()
+        print(f"Cache: {cache['memory_hits']} memory hits, {cache['disk_hits']} disk hits, "
+              f"{cache['misses']} misses ({cache['hit_rate']:.1%} hit rate)"
+              + (f", {cache['disk_errors']} disk errors" if cache.get('disk_errors') else ""))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a headless AI Chess Arena tournament")
+    parser.add_argument("models", nargs="+", help="OpenRouter model ids (first model is the gauntlet champion)")
+    parser.add_argument("--scheme", choices=PAIRING_SCHEMES, default="round-robin")
+    parser.add_argument("--games-per-pair", type=int, default=2, help="Games per pairing, alternating colours")
+    parser.add_argument("--rounds", type=int, default=None, help="Number of Swiss rounds")
+    parser.add_argument("--sprt-elo", type=float, default=50.0,
+                        help="Adaptive scheme: a pairing is decided once one model is shown this many Elo stronger")
+    parser.add_argument("--sprt-alpha", type=float, default=0.05, help="Adaptive scheme: SPRT false positive rate")
+    parser.add_argument("--sprt-beta", type=float, default=0.05, help="Adaptive scheme: SPRT false negative rate")
+    parser.add_argument("--max-games-per-pair", type=int, default=100,
+                        help="Adaptive scheme: games after which an undecided pairing is dropped")
+    parser.add_argument("--openings", default=None, metavar="PATH",
+                        help="EPD or FEN file of start positions, one per line; each is played twice with colours swapped")
+    parser.add_argument("--book", default=None, metavar="PATH",
+                        help="Polyglot opening book; the first --book-plies plies are taken from it without API calls")
+    parser.add_argument("--book-plies", type=int, default=8, help="Maximum plies played from --book")
+    parser.add_argument("--shuffle-openings", action="store_true",
+                        help="Sample --openings positions at random instead of in file order")
+    parser.add_argument("--openings-seed", type=int, default=None,
+                        help="Seed for position sampling and book move choice, so runs can be reproduced")
+    parser.add_argument("--adjudicate", choices=ADJUDICATION_MODES, default=None,
+                        help="End decided games early using a material count or a local UCI engine")
+    parser.add_argument("--engine", default=None, metavar="PATH", help="UCI engine for --adjudicate engine")
+    parser.add_argument("--engine-pool", type=int, default=None,
+                        help="Engine processes shared by all games (default: --concurrency)")
+    parser.add_argument("--engine-depth", type=int, default=10, help="Search depth per adjudication evaluation")
+    parser.add_argument("--engine-time", type=float, default=None, help="Search time limit per evaluation in seconds")
+    parser.add_argument("--syzygy", default=None, metavar="DIR", help="Syzygy tablebase directory for exact endgame results")
+    parser.add_argument("--adjudicate-score", type=int, default=600,
+                        help="Centipawn advantage that decides a game once held for --adjudicate-plies plies")
+    parser.add_argument("--adjudicate-plies", type=int, default=8)
+    parser.add_argument("--draw-score", type=int, default=10,
+                        help="Games stay within this many centipawns for --draw-plies plies are drawn")
+    parser.add_argument("--draw-plies", type=int, default=0, help="0 disables draw adjudication")
+    parser.add_argument("--max-plies", type=int, default=200,
+                        help="Adjudicate by evaluation once a game reaches this many plies (0 disables)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of games played at once")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Shard games across this many worker processes, each with its own HTTP client")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Drive all games from one asyncio event loop over a shared HTTP/2 connection pool")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_RATE,
+                        help="Requests per second per model. 429s and server errors are retried with backoff; "
+                             "a game is aborted rather than given a random move when retries run out")
+    parser.add_argument("--burst", type=int, default=5, help="Token bucket size per model")
+    parser.add_argument("--max-retries", type=int, default=8, help="Retries per move before a game is aborted")
+    parser.add_argument("--batch-window", type=float, default=None, metavar="SECONDS",
+                        help="Collect move requests for the same model for up to this long and send them together")
+    parser.add_argument("--batch-size", type=int, default=8, help="Maximum positions per batch")
+    parser.add_argument("--prompt", default=DEFAULT_TEMPLATE, metavar="TEMPLATE[,TEMPLATE...]",
+                        help=f"Prompt template for every model: {', '.join(TEMPLATES)}. With several, positions "
+                             "alternate between them so their cost and illegal-move rate can be compared")
+    parser.add_argument("--prompt-profile", action="append", default=[], metavar="PATTERN=TEMPLATE[,TEMPLATE...]",
+                        help="Prompt templates for the models matching a glob such as 'openai/*' (repeatable, "
+                             "first match wins)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream completions and stop reading as soon as the reply contains a legal move")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="Reuse model responses for repeated positions, persisted in this SQLite file")
+    parser.add_argument("--cache-memory-size", type=int, default=10000, help="Responses kept in the in-memory LRU")
+    parser.add_argument("--base-url", default="https://openrouter.ai", help="OpenRouter API base URL")
+    parser.add_argument("--api-key", default=None, help="OpenRouter API key (defaults to $OPENROUTER_API_KEY or config.json)")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH,
+                        help="Cached model catalog used to check the model ids without a network round trip")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG logs every ply, INFO every finished game")
+    parser.add_argument("--log-json", action="store_true", help="Write logs to stderr as JSON lines")
+    parser.add_argument("--log-payload-sample-rate", type=float, default=0.0,
+                        help="Fraction of API responses dumped in full at DEBUG level")
+    parser.add_argument("--archive", default=None, metavar="DIR",
+                        help="Stream finished games to a PGN + compact binary archive in this directory")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics on /metrics (and JSON on /metrics.json) at this port")
+    parser.add_argument("--metrics-json", default=None, metavar="PATH",
+                        help="Write a JSON metrics snapshot to this file every --metrics-interval seconds")
+    parser.add_argument("--metrics-interval", type=float, default=10.0)
+    parser.add_argument("--journal", default=None, metavar="PATH",
+                        help="Record every ply to this append-only journal and resume from it when it already exists")
+    parser.add_argument("--journal-fsync", action="store_true", help="fsync the journal after every write")
+    parser.add_argument("--bootstrap", type=int, default=1000, metavar="SAMPLES",
+                        help="Bootstrap samples for the rating confidence intervals in the report (0 disables)")
+    parser.add_argument("--output", default=None, help="Write the JSON report and game records to this file")
+    args = parser.parse_args(argv)
+    if args.workers and args.use_async:
+        parser.error("--workers runs threaded games in each process and cannot be combined with --async")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    api_key = args.api_key or load_api_key()
+    if not api_key:
+        raise SystemExit("OpenRouter API key not set")
+
+    configure_logging(args.log_level, json_lines=args.log_json, payload_sample_rate=args.log_payload_sample_rate)
+
+    catalog = ModelCatalog(OpenRouterClient(api_key, args.base_url), args.catalog)
+    if catalog.load():
+        for model in catalog.unknown(args.models):
+            log_event(logger, logging.WARNING, "unknown_model", model=model, catalog=args.catalog)
+
+    try:
+        prompts = PromptProfiles.parse(args.prompt, args.prompt_profile)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    archive = GameArchive(args.archive) if args.archive else None
+    journal = RunJournal(args.journal, fsync=args.journal_fsync) if args.journal else None
+    openings = None
+    if args.openings or args.book:
+        openings = OpeningBook(args.openings, args.book, args.book_plies, args.shuffle_openings, args.openings_seed)
+    metrics_server = MetricsServer(port=args.metrics_port).start() if args.metrics_port else None
+    snapshot_writer = MetricsSnapshotWriter(args.metrics_json, args.metrics_interval).start() if args.metrics_json else None
+
+    options = dict(
+        on_game_finished=archive.append if archive else None,
+        scheme=args.scheme,
+        games_per_pair=args.games_per_pair,
+        rounds=args.rounds,
+        concurrency=args.concurrency,
+        journal=journal,
+        bootstrap_samples=args.bootstrap,
+        openings=openings,
+        sprt_options=dict(elo_margin=args.sprt_elo, alpha=args.sprt_alpha, beta=args.sprt_beta,
+                          max_games_per_pair=args.max_games_per_pair),
+    )
+
+    scheduler_options = dict(
+        rate=args.rate_limit,
+        burst=args.burst,
+        max_retries=args.max_retries,
+        max_concurrency=args.concurrency,
+    )
+
+    batch_options = dict(
+        window=args.batch_window,
+        max_batch_size=args.batch_size,
+    ) if args.batch_window is not None else None
+
+    adjudication_options = dict(
+        mode=args.adjudicate,
+        engine=args.engine,
+        engine_pool=args.engine_pool or args.concurrency,
+        engine_depth=args.engine_depth,
+        engine_time=args.engine_time,
+        syzygy=args.syzygy,
+        score=args.adjudicate_score,
+        plies=args.adjudicate_plies,
+        draw_score=args.draw_score,
+        draw_plies=args.draw_plies,
+        max_plies=args.max_plies,
+    ) if args.adjudicate else None
+
+    cache = None
+    adjudicator = None
+    if adjudication_options and not args.workers:
+        adjudicator = options["adjudicator"] = build_adjudicator(**adjudication_options)
+
+    if args.workers:
+        from process_runner import ProcessTournamentRunner
+
+        client_options = dict(
+            api_key=api_key,
+            base_url=args.base_url,
+            scheduler_options=scheduler_options,
+            batch_options=batch_options,
+            stream=args.stream,
+            prompts=prompts,
+        )
+        cache_options = dict(path=args.cache, memory_size=args.cache_memory_size) if args.cache else None
+        log_options = dict(level=args.log_level, json_lines=args.log_json,
+                           payload_sample_rate=args.log_payload_sample_rate)
+        runner = ProcessTournamentRunner(client_options, args.models, workers=args.workers,
+                                         cache_options=cache_options, log_options=log_options,
+                                         adjudication_options=adjudication_options, **options)
+        report = runner.run()
+    elif args.use_async:
+        from async_openrouter_client import AsyncOpenRouterClient
+
+        cache = MoveCache(args.cache, memory_size=args.cache_memory_size) if args.cache else None
+
+        async def run_async():
+            async with AsyncOpenRouterClient(api_key, args.base_url, max_connections=args.concurrency,
+                                             cache=cache, stream=args.stream, prompts=prompts) as api_client:
+                client = AsyncRequestScheduler(api_client, **scheduler_options)
+                if batch_options:
+                    client = AsyncMoveBatcher(client, **batch_options)
+                runner = AsyncTournamentRunner(client, args.models, **options)
+                return runner, await runner.run()
+
+        runner, report = asyncio.run(run_async())
+    else:
+        cache = MoveCache(args.cache, memory_size=args.cache_memory_size) if args.cache else None
+        client = build_client(api_key, args.base_url, cache, scheduler_options, batch_options, args.stream, prompts)
+        runner = TournamentRunner(client, args.models, **options)
+        report = runner.run()
+
+    if cache is not None:
+        report["cache"] = cache.stats()
+        cache.close()
+
+    if archive is not None:
+        archive.close()
+
+    if journal is not None:
+        journal.close()
+
+    if adjudicator is not None:
+        adjudicator.close()
+
+    if openings is not None:
+        openings.close()
+
+    if snapshot_writer is not None:
+        snapshot_writer.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
+
+    print()
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(report, records=runner.games, metrics=metrics.snapshot()), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()